@@ -0,0 +1,123 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from color import *
+from metrics import percentiles
+
+
+class Endpoint:
+    def __init__(self, url):
+        self.url = url
+        self.outstanding = 0
+        self.healthy = True
+        self.failures = 0  # Ошибок подряд, сбрасывается первым успешным ответом
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.probing = False
+        self.requests = 0
+        self.errors = 0
+        self.latencies = defaultdict(list)
+        self.tests = 0
+        self.successes = 0
+
+
+def is_endpoint_failure(error):
+    # 4xx и 501 - ответ на конкретный запрос (WAV, /decode_batch), а не признак больного сервера
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500 and error.status != 501
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+class EndpointPool:
+    """Серверы кодека: запрос идёт на здоровый сервер с наименьшим числом незавершённых запросов."""
+
+    def __init__(self, urls, probe, eject_after=3, eject_seconds=10.0):
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.probe = probe
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self._probes = set()  # Ссылки на фоновые проверки: задачу без ссылки может собрать сборщик мусора
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def pick(self):
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            if not endpoint.healthy and not endpoint.probing and now >= endpoint.ejected_until:
+                endpoint.probing = True
+                probe = asyncio.ensure_future(self.reprobe(endpoint))
+                self._probes.add(probe)
+                probe.add_done_callback(self._probes.discard)
+
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.healthy]
+        if not healthy:
+            # Исключены все - запрос идёт на сервер, который раньше других вернётся в работу
+            return min(self.endpoints, key=lambda endpoint: endpoint.ejected_until)
+        least = min(endpoint.outstanding for endpoint in healthy)
+        return random.choice([endpoint for endpoint in healthy if endpoint.outstanding == least])
+
+    @asynccontextmanager
+    async def acquire(self, kind):
+        endpoint = self.pick()
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        started = time.perf_counter()
+        try:
+            yield endpoint
+        except Exception as e:
+            if is_endpoint_failure(e):
+                endpoint.errors += 1
+                self.fail(endpoint)
+            raise
+        else:
+            endpoint.failures = 0
+            endpoint.latencies[kind].append(time.perf_counter() - started)
+        finally:
+            endpoint.outstanding -= 1
+
+    def fail(self, endpoint):
+        endpoint.failures += 1
+        if endpoint.healthy and endpoint.failures >= self.eject_after:
+            self.eject(endpoint)
+            print(f"\n{COLOR_YELLOW}Сервер {endpoint.url} исключён после {endpoint.failures} ошибок подряд{COLOR_RESET}")
+
+    def eject(self, endpoint):
+        endpoint.healthy = False
+        endpoint.ejections += 1
+        endpoint.ejected_until = time.monotonic() + self.eject_seconds
+
+    async def reprobe(self, endpoint):
+        try:
+            if await self.probe(endpoint.url):
+                endpoint.healthy = True
+                endpoint.failures = 0
+                print(f"\n{COLOR_GREEN}Сервер {endpoint.url} снова доступен{COLOR_RESET}")
+            else:
+                endpoint.ejected_until = time.monotonic() + self.eject_seconds
+        finally:
+            endpoint.probing = False
+
+    def close(self):
+        for probe in self._probes:
+            probe.cancel()
+
+    def record_score(self, endpoint, success):
+        endpoint.tests += 1
+        endpoint.successes += bool(success)
+
+    def print_summary(self):
+        print(f"\n{COLOR_BOLD}{COLOR_CYAN}=== Серверы ==={COLOR_RESET}")
+        for endpoint in self.endpoints:
+            parts = [f"{endpoint.requests} запросов", f"ошибок {endpoint.errors}", f"исключений {endpoint.ejections}"]
+            for kind, samples in endpoint.latencies.items():
+                p = percentiles(samples)
+                parts.append(f"{kind} {p['p50'] * 1000:.1f} / {p['p95'] * 1000:.1f} / {p['p99'] * 1000:.1f} мс")
+            if endpoint.tests:
+                parts.append(f"успешных {endpoint.successes}/{endpoint.tests} ({endpoint.successes / endpoint.tests:.1%})")
+            print(f"{COLOR_BOLD}{endpoint.url}:{COLOR_RESET} " + ", ".join(parts))
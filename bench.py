@@ -0,0 +1,231 @@
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from color import *
+from config import GROUPS, NUM_STRINGS_PER_GROUP, NOISE_TESTS
+from main import (TOTAL_TESTS_PER_STRING, audio_to_base64, audio_to_json_body, audio_to_wav_bytes, base64_to_audio,
+                  normalize_audio, denormalize_audio, generate_random_digits_batch)
+from corpus import Corpus, generate_strings
+from noises import NoiseWorkspace, add_tonal_noise, add_ac_hum
+from report import generate_html_report, synthetic_results
+from similarity import calculate_similarity, corrupt
+from streaming import noise_blocks
+from wav_codec import SAMPLE_RATE
+
+SAMPLES_PER_CHAR = 64  # Длина сигнала на символ строки, как у заглушки кодека
+SUITES = ("noises", "streaming", "codec", "normalize", "similarity", "digits", "report")
+
+
+def measure(func, repeats):
+    func()  # Прогрев: таблицы синуса, буферы и кэши создаются до замера
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return {"best": min(samples), "median": statistics.median(samples)}
+
+
+def noise_cases(group, audio):
+    workspace = NoiseWorkspace()
+    generator = np.random.default_rng(0)
+    length = len(audio)
+    for test in NOISE_TESTS:
+        params = dict(zip(test["args"], test["tests"][0]["values"]))
+        func = test["func"]
+        yield f"noises/{func.__name__}/{group}", lambda func=func, params=params: func(
+            audio, generator=generator, out=workspace.buffer("out", length),
+            scratch=workspace.buffer("scratch", length), **params)
+
+
+def stream_all(audio, func, params, block_size):
+    return np.concatenate([block.copy() for block in noise_blocks(audio, func, params, block_size=block_size)])
+
+
+def streaming_cases(group, audio):
+    for func, params in ((add_tonal_noise, {"freq": 1000.0, "amplitude": 0.1}),
+                         (add_ac_hum, {"base_freq": 50.0, "amplitude": 0.1, "num_harmonics": 3})):
+        # Потоковый путь собирает блоки из таблиц длины блока и обязан совпадать с таблицей на весь сигнал
+        # с точностью много меньше шага int16; нечётный размер блока проверяет перенос фазы
+        for block_size in (65_536, 1_000):
+            if not np.allclose(stream_all(audio, func, params, block_size), func(audio, **params), rtol=0, atol=1e-6):
+                raise AssertionError(f"{func.__name__}: потоковый шум с блоком {block_size} расходится с кэшем таблиц")
+        yield f"streaming/{func.__name__}/{group}", lambda func=func, params=params: stream_all(audio, func, params, 65_536)
+
+
+def scipy_to_wav(pcm):
+    # Прежний путь для сравнения: wavfile.write в BytesIO и копия getvalue()
+    from scipy.io import wavfile
+
+    buffer = io.BytesIO()
+    wavfile.write(buffer, SAMPLE_RATE, pcm)
+    return buffer.getvalue()
+
+
+def scipy_to_json(pcm):
+    # Дальше ещё b64encode, str и json.dumps, как делает aiohttp для json=
+    return json.dumps({"data": base64.b64encode(scipy_to_wav(pcm)).decode("utf-8")}).encode()
+
+
+def scipy_from_base64(text):
+    from scipy.io import wavfile
+
+    with io.BytesIO(base64.b64decode(text)) as buffer:
+        _, audio = wavfile.read(buffer)
+    return audio
+
+
+def codec_cases(group, audio):
+    pcm = denormalize_audio(audio)
+    encoded = audio_to_base64(pcm)
+    # Собственный кодек обязан давать те же байты, что и путь через scipy
+    if audio_to_wav_bytes(pcm) != scipy_to_wav(pcm) or bytes(audio_to_json_body(pcm)) != scipy_to_json(pcm):
+        raise AssertionError(f"WAV кодек расходится с scipy на {group} символах")
+    if not np.array_equal(base64_to_audio(encoded), pcm):
+        raise AssertionError(f"разбор base64 расходится с исходным сигналом на {group} символах")
+    yield f"codec/audio_to_wav_bytes/{group}", lambda: audio_to_wav_bytes(pcm)
+    yield f"codec/audio_to_base64/{group}", lambda: audio_to_base64(pcm)
+    yield f"codec/audio_to_json_body/{group}", lambda: audio_to_json_body(pcm)
+    yield f"codec/base64_to_audio/{group}", lambda: base64_to_audio(encoded)
+    yield f"codec/scipy_to_wav/{group}", lambda: scipy_to_wav(pcm)
+    yield f"codec/scipy_to_json/{group}", lambda: scipy_to_json(pcm)
+    yield f"codec/scipy_from_base64/{group}", lambda: scipy_from_base64(encoded)
+
+
+def normalize_cases(group, audio):
+    pcm = denormalize_audio(audio)
+    yield f"normalize/normalize_audio/{group}", lambda: normalize_audio(pcm)
+    yield f"normalize/denormalize_audio/{group}", lambda: denormalize_audio(audio)
+
+
+def similarity_cases(group, audio):
+    generator = np.random.default_rng(0)
+    original = generate_random_digits_batch(group, 1, generator)[0]
+    decoded = corrupt(original, 0.05, generator)
+    yield f"similarity/calculate_similarity/{group}", lambda: calculate_similarity(original, decoded)
+
+
+def digits_cases(group, audio):
+    generator = np.random.default_rng(0)
+    yield (f"digits/generate_random_digits_batch/{group}",
+           lambda: generate_random_digits_batch(group, NUM_STRINGS_PER_GROUP, generator))
+    yield (f"digits/generate_strings_alnum_uniform/{group}",
+           lambda: generate_strings(group, NUM_STRINGS_PER_GROUP, generator, "alnum", "uniform"))
+
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, "corpus.bin")
+    Corpus.build([group], NUM_STRINGS_PER_GROUP, 0).save(filename)
+    yield f"digits/corpus_load/{group}", lambda: Corpus.load(filename).strings(group)
+    os.remove(filename)
+    os.rmdir(directory)
+
+
+def report_cases(group, audio):
+    results = synthetic_results(1, NUM_STRINGS_PER_GROUP, TOTAL_TESTS_PER_STRING, group)
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, "report.html")
+    yield f"report/generate_html_report/{group}", lambda: generate_html_report(results, filename, quiet=True)
+    os.remove(filename)
+    os.rmdir(directory)
+
+
+SUITE_CASES = {
+    "noises": noise_cases,
+    "streaming": streaming_cases,
+    "codec": codec_cases,
+    "normalize": normalize_cases,
+    "similarity": similarity_cases,
+    "digits": digits_cases,
+    "report": report_cases,
+}
+
+
+def run_suite(groups, suites, repeats):
+    results = {}
+    generator = np.random.default_rng(0)
+    for group in groups:
+        length = group * SAMPLES_PER_CHAR
+        audio = generator.uniform(-0.5, 0.5, size=length).astype(np.float32)
+        print(f"\n{COLOR_BOLD}{COLOR_CYAN}=== {group} символов ({length} отсчётов) ==={COLOR_RESET}")
+
+        for suite in suites:
+            for name, func in SUITE_CASES[suite](group, audio):
+                results[name] = measure(func, repeats)
+                print(f"  {COLOR_BOLD}{name}{COLOR_RESET}: {results[name]['best'] * 1000:.3f} мс "
+                      f"(медиана {results[name]['median'] * 1000:.3f} мс)")
+    return results
+
+
+def save_baseline(filename, results, groups, repeats):
+    data = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "groups": groups,
+        "repeats": repeats,
+        "results": results,
+    }
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"\n{COLOR_GREEN}Базовые замеры сохранены как: {os.path.abspath(filename)}{COLOR_RESET}")
+
+
+def compare(filename, results, threshold):
+    with open(filename, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    print(f"\n{COLOR_BOLD}{COLOR_CYAN}=== Сравнение с {filename} (порог {threshold:.0%}) ==={COLOR_RESET}")
+    regressions = []
+    for name, timing in results.items():
+        if name not in baseline:
+            continue
+        # Сравнивается лучшее время: оно меньше всего зависит от фоновой нагрузки
+        ratio = timing["best"] / baseline[name]["best"]
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            color, mark = COLOR_RED, "регрессия"
+        elif ratio < 1 - threshold:
+            color, mark = COLOR_GREEN, "ускорение"
+        else:
+            continue
+        print(f"  {COLOR_BOLD}{name}{COLOR_RESET}: {baseline[name]['best'] * 1000:.3f} -> "
+              f"{timing['best'] * 1000:.3f} мс ({color}x{ratio:.2f}, {mark}{COLOR_RESET})")
+
+    if regressions:
+        print(f"{COLOR_RED}{COLOR_BOLD}Регрессий: {len(regressions)}{COLOR_RESET}")
+    else:
+        print(f"{COLOR_GREEN}Регрессий нет{COLOR_RESET}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Набор замеров горячих путей: шумы, WAV/base64, сходство, отчёт")
+    parser.add_argument("--groups", type=int, nargs="+", default=GROUPS)
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--save", metavar="FILE", help="сохранить замеры как базовые в JSON")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с базовыми замерами из JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление, доля")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.groups, args.suites, args.repeats)
+    if args.save:
+        save_baseline(args.save, results, args.groups, args.repeats)
+    if args.compare and compare(args.compare, results, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+import json
+import os
+
+from color import *
+
+
+class Checkpoint:
+    """Контрольная точка прогона: seed, строки групп и завершённые тесты дописываются построчно в JSONL."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.seed = None
+        self.strings = {}
+        self.completed = {}
+        self.valid_size = 0  # Байт до конца последней целой записи
+
+    def load(self, run_info):
+        # Точка от другого набора групп или шумов не подходит: её результаты нельзя смешивать с новыми
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    # Последняя строка могла оборваться при аварийном завершении, в том числе перед "\n"
+                    if not line.endswith(b"\n"):
+                        raise ValueError
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.valid_size += len(line)
+                if record["type"] == "run":
+                    if record["info"] != run_info:
+                        return False
+                    self.seed = record["seed"]
+                elif record["type"] == "strings":
+                    self.strings[record["group"]] = record["strings"]
+                elif record["type"] == "test":
+                    self.completed[(record["group"], record["string"], record["test"])] = record["result"]
+        return self.seed is not None
+
+    def open(self, seed, run_info):
+        resumed = self.seed is not None
+        self.seed = seed
+        # Строковая буферизация: каждая запись попадает в файл сразу после завершения теста
+        self.file = open(self.path, "a" if resumed else "w", encoding="utf-8", buffering=1)
+        if resumed:
+            # Оборванный хвост отрезается, иначе первая новая запись склеится с ним и потеряется при следующем --resume
+            self.file.truncate(self.valid_size)
+        if not resumed:
+            self.write({"type": "run", "seed": seed, "info": run_info})
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_strings(self, group, strings):
+        self.strings[group] = strings
+        self.write({"type": "strings", "group": group, "strings": strings})
+
+    def result(self, group, string_index, test):
+        return self.completed.get((group, string_index, test))
+
+    def on_done(self, string_key, test, task):
+        # Тесты с ошибкой не сохраняются и при продолжении выполняются заново
+        if self.file.closed or task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if "error" in result:
+            return
+        group, string_index = string_key
+        self.completed[(group, string_index, test)] = result
+        self.write({"type": "test", "group": group, "string": string_index, "test": test, "result": result})
+
+    def close(self):
+        if self.file and not self.file.closed:
+            self.file.close()
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
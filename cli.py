@@ -0,0 +1,155 @@
+import argparse
+import os
+import sys
+import time
+
+# Здесь только стандартная библиотека: numpy, aiohttp и Levenshtein импортируются внутри команд,
+# поэтому --help и разбор аргументов не ждут их загрузки
+STARTED = time.perf_counter()
+
+
+def noise_key(test):
+    # add_gaussian_noise -> gaussian, add_ac_hum -> ac_hum
+    return test["func"].__name__.removeprefix("add_").removesuffix("_noise")
+
+
+def select_noises(tests, keys):
+    selected = []
+    for key in keys:
+        matches = [test for test in tests if key in (noise_key(test), test["name"])]
+        if not matches:
+            known = ", ".join(noise_key(test) for test in tests)
+            raise SystemExit(f"Неизвестный шум: {key} (доступны: {known})")
+        selected.extend(test for test in matches if test not in selected)
+    return selected
+
+
+def apply_run_options(main, args):
+    # Настройки прогона - глобальные переменные main, подменяются до запуска
+    if args.groups:
+        main.GROUPS = args.groups
+    if args.strings is not None:
+        main.NUM_STRINGS_PER_GROUP = args.strings
+    if args.noises is not None:
+        tests = select_noises(main.NOISE_TESTS, args.noises) if args.noises else []
+        main.NOISE_CONFIGS = main.generate_test_configs(tests)
+        main.TOTAL_TESTS_PER_STRING = 1 + len(main.NOISE_CONFIGS)
+    if args.base_url:
+        main.BASE_URL = args.base_url.rstrip("/")
+    if args.endpoints:
+        main.ENDPOINTS = [url.rstrip("/") for url in args.endpoints]
+    if args.corpus:
+        main.CORPUS_FILE = args.corpus
+    if args.seed is not None:
+        main.SEED = args.seed
+    if args.silent is not None:
+        main.SILENT_MODE = args.silent
+    if args.adaptive is not None:
+        main.ADAPTIVE_SAMPLING = args.adaptive
+    if args.min_samples is not None:
+        main.ADAPTIVE_MIN_SAMPLES = args.min_samples
+    if args.max_samples is not None:
+        main.ADAPTIVE_MAX_SAMPLES = args.max_samples
+
+
+def command_run(args):
+    if args.no_color:
+        # color.py читает NO_COLOR при импорте, поэтому до import main
+        os.environ["NO_COLOR"] = "1"
+    import asyncio
+    import main
+
+    apply_run_options(main, args)
+    print(f"{main.COLOR_CYAN}Запуск: {(time.perf_counter() - STARTED) * 1000:.0f} мс{main.COLOR_RESET}")
+
+    # Без терминала (CI, cron) ждать Enter некому
+    headless = args.headless or not sys.stdin.isatty()
+    try:
+        if not headless:
+            main.display_heart()
+            input()
+        results = asyncio.run(main.main(args.resume))
+    except KeyboardInterrupt:
+        print(f"\n{main.COLOR_RED}{main.COLOR_BOLD}Программа прервана пользователем.{main.COLOR_RESET}")
+        main.print_resume_hint()
+        return 130
+    except Exception as e:
+        print(f"\n{main.COLOR_RED}{main.COLOR_BOLD}Неожиданная ошибка: {e}{main.COLOR_RESET}")
+        main.print_resume_hint()
+        return 1
+    # Сервер недоступен - прогона не было
+    return 0 if results else 2
+
+
+def command_bench(args):
+    import bench
+
+    return bench.main(args.forwarded)
+
+
+def command_corpus(args):
+    import corpus
+
+    return corpus.main(args.forwarded)
+
+
+def command_report(args):
+    from report import generate_html_report
+    from results_log import load_log_results
+
+    if not os.path.exists(args.log):
+        raise SystemExit(f"Журнал не найден: {args.log}")
+    generate_html_report(load_log_results(args.log), args.output)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Тестирование аудио кодека без интерактивного запуска")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="прогон тестов против сервера кодека")
+    run.add_argument("--groups", type=int, nargs="+", metavar="N", help="длины строк (по умолчанию GROUPS)")
+    run.add_argument("--strings", type=int, metavar="N", help="строк в группе (по умолчанию NUM_STRINGS_PER_GROUP)")
+    run.add_argument("--noises", nargs="*", metavar="NOISE",
+                     help="шумы: gaussian white impulse reverb tonal ac_hum или имя из config.py; "
+                          "без значений - только чистый тест")
+    run.add_argument("--base-url", help="адрес сервера (по умолчанию BASE_URL)")
+    run.add_argument("--endpoints", nargs="+", metavar="URL", help="несколько серверов вместо BASE_URL")
+    run.add_argument("--seed", type=int, help="seed прогона")
+    run.add_argument("--corpus", metavar="FILE", help="сохранённый корпус строк (по умолчанию CORPUS_FILE)")
+    run.add_argument("--resume", action="store_true", help="продолжить прерванный прогон с контрольной точки")
+    run.add_argument("--headless", action="store_true",
+                     help="без заставки и ожидания Enter (включается сам, если нет терминала)")
+    run.add_argument("--silent", action=argparse.BooleanOptionalAction, help="краткий вывод (по умолчанию SILENT_MODE)")
+    run.add_argument("--adaptive", action=argparse.BooleanOptionalAction,
+                     help="останавливать тесты группы по доверительному интервалу (по умолчанию ADAPTIVE_SAMPLING)")
+    run.add_argument("--min-samples", type=int, metavar="N", help="строк до первой проверки интервала")
+    run.add_argument("--max-samples", type=int, metavar="N", help="строк в группе при адаптивной выборке")
+    run.add_argument("--no-color", action="store_true", help="без ANSI цветов (как NO_COLOR=1)")
+    run.set_defaults(handler=command_run)
+
+    # Аргументы bench и corpus, включая --help, разбирают сами bench.py и corpus.py
+    bench = commands.add_parser("bench", help="замеры горячих путей, аргументы как у bench.py", add_help=False)
+    bench.set_defaults(handler=command_bench, forward=True)
+    corpus = commands.add_parser("corpus", help="сохранённые корпуса строк, аргументы как у corpus.py", add_help=False)
+    corpus.set_defaults(handler=command_corpus, forward=True)
+
+    report = commands.add_parser("report", help="HTML отчёт по журналу результатов")
+    report.add_argument("log", help="журнал test_results_*.jsonl или .csv, можно .gz")
+    report.add_argument("--output", help="имя HTML файла (по умолчанию test_report_<время>.html)")
+    report.set_defaults(handler=command_report)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if getattr(args, "forward", False):
+        args.forwarded = extra
+    elif extra:
+        parser.error(f"неизвестные аргументы: {' '.join(extra)}")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,3 +1,5 @@
+import os
+
 from config import *
 
 # ANSI цветовые коды
@@ -12,6 +14,11 @@ COLOR_WHITE = "\033[37m"
 COLOR_BOLD = "\033[1m"
 COLOR_PINK = '\033[95m'
 
+# NO_COLOR (https://no-color.org) - журналы CI и cron без управляющих последовательностей
+if os.environ.get("NO_COLOR"):
+    COLOR_RESET = COLOR_RED = COLOR_GREEN = COLOR_YELLOW = COLOR_BLUE = ""
+    COLOR_MAGENTA = COLOR_CYAN = COLOR_WHITE = COLOR_BOLD = COLOR_PINK = ""
+
 # Уровни сложности и их цвета
 if RAINBOW_MODE:
     DIFFICULTY_COLORS = {
@@ -9,6 +9,86 @@ RAINBOW_MODE = False  # Установите в True для цветного в
 GROUPS = [1, 10, 100, 1_000, 5_000, 10_000, 20_000, 30_000]  # Группы тестов с n-ой длинной строки
 NUM_STRINGS_PER_GROUP = 5  # Количество тестовых строк на группу
 
+# Расстояние Левенштейна считается только до порога успеха 90%: для неуспешных тестов
+# выводится и пишется в журнал верхняя граница сходства (со знаком ≤), для успешных - точное значение.
+# Выигрыш заметен на длинных строках (python similarity.py: x1.4 на 100, x3.8 на 1000, x14 на 30000 символов),
+# поэтому строки короче FAST_SIMILARITY_MIN_LENGTH всегда считаются точно
+FAST_SIMILARITY = False
+FAST_SIMILARITY_MIN_LENGTH = 1000
+
+SEED = None  # Целое число для воспроизводимого прогона (None - случайный seed, выводится в консоль)
+
+MAX_CONCURRENT_REQUESTS = 8  # Максимум одновременных запросов к серверу
+MAX_CONCURRENT_STRINGS = 2  # Сколько строк группы тестируются одновременно
+
+EXECUTOR_MODE = "thread"  # Пул для генерации шума и сериализации WAV: "thread" или "process"
+EXECUTOR_WORKERS = 4  # Количество потоков/процессов в пуле
+
+# Передача аудио: "json" (base64 внутри JSON), "binary" (тело audio/wav)
+# или "auto" (binary, если /ping сообщает "binary_audio": true)
+AUDIO_TRANSPORT = "auto"
+
+# Сколько зашумлённых вариантов строки отправлять одним запросом на /decode_batch
+# (1 - без пакетов; если сервер не поддерживает /decode_batch, клиент вернётся к /decode)
+DECODE_BATCH_SIZE = 1
+
+# Генерировать все уровни сложности одного шума одним пакетным проходом (noise_engine.py)
+VECTORIZED_NOISE = False
+
+# Лимит памяти кэша таблиц синуса для тонального шума и шума сети
+OSCILLATOR_CACHE_MAX_MB = 256
+
+# Сигналы от STREAM_MIN_SAMPLES отсчётов зашумляются и отправляются на /decode блоками,
+# не собирая WAV целиком в памяти (None - выключено; не используется с пакетами и VECTORIZED_NOISE)
+STREAM_MIN_SAMPLES = 1_000_000
+STREAM_BLOCK_SIZE = 65_536
+
+# Журнал результатов: каждый тест сразу дописывается в файл, отчёт читает детали из него
+RESULTS_LOG = "jsonl"  # "jsonl", "csv" или None (все детали в памяти, как раньше)
+RESULTS_LOG_COMPRESS = False  # Сжимать журнал gzip
+
+# Дисковый кэш результатов /encode (ключ - текст и версия кодера из /ping; без encoder/version в /ping кэш отключается)
+ENCODE_CACHE = True
+ENCODE_CACHE_DIR = ".encode_cache"
+ENCODE_CACHE_MAX_MB = 512
+
+# Серверы кодека: запросы распределяются между доступными по числу незавершённых запросов
+ENDPOINTS = None  # Список адресов, например ["http://localhost:8000", "http://localhost:8001"]; None - только BASE_URL
+ENDPOINT_EJECT_AFTER = 3  # Ошибок подряд до исключения сервера
+ENDPOINT_EJECT_SECONDS = 10  # Через сколько секунд исключённый сервер проверяется снова
+
+# Политика запросов: таймауты по размеру тела и наблюдаемым задержкам, повторы и дублирование
+REQUEST_TIMEOUT_BASE = 10  # Таймаут запроса без учёта размера, с
+REQUEST_TIMEOUT_PER_MB = 10  # Добавка к таймауту на каждый МБ тела запроса, с
+REQUEST_TIMEOUT_MIN = 2  # Нижняя граница адаптивного таймаута, с
+REQUEST_TIMEOUT_MAX = 300  # Верхняя граница любого таймаута, с
+REQUEST_TIMEOUT_P99_FACTOR = 4  # После 20 ответов таймаут - p99 задержек группы, умноженный на коэффициент
+REQUEST_RETRIES = 2  # Повторов после таймаута, обрыва соединения или 429/5xx
+RETRY_BACKOFF_BASE = 0.2  # Пауза перед повтором - случайная в пределах base * 2^попытка, с
+RETRY_BACKOFF_MAX = 5
+HEDGE_REQUESTS = False  # Дублировать запрос, если ответа нет дольше перцентиля HEDGE_PERCENTILE
+HEDGE_PERCENTILE = 95
+
+# Корпус тестовых строк
+CORPUS_ALPHABET = "digits"  # "digits", "hex", "latin", "alnum", "printable" или своя строка символов ASCII
+CORPUS_LENGTHS = "fixed"  # Длины строк группы: "fixed" (ровно длина группы), "uniform" или "normal" вокруг неё
+CORPUS_LENGTH_SPREAD = 0.5  # Разброс длин для "uniform" и "normal", доля длины группы
+CORPUS_FILE = None  # Сохранённый корпус (python corpus.py build ...): строки групп берутся из него
+
+# Адаптивная выборка: тест (группа, конфиг шума) больше не запускается, когда односторонняя граница Уилсона
+# доли успехов выше или ниже порога 90% либо двусторонний интервал сузился до ±ADAPTIVE_PRECISION.
+# Успех выше порога подтверждается не раньше 25 успехов подряд, поэтому при ADAPTIVE_MAX_SAMPLES около
+# NUM_STRINGS_PER_GROUP экономят явно проваленные тесты; большее значение уточняет интервалы, но может
+# отправить больше запросов, чем прогон без выборки
+ADAPTIVE_SAMPLING = False
+ADAPTIVE_CONFIDENCE = 0.95  # Уровень доверия интервала Уилсона
+ADAPTIVE_PRECISION = 0.05  # Достаточная полуширина интервала
+ADAPTIVE_MIN_SAMPLES = 3  # Строк до первой проверки интервала
+ADAPTIVE_MAX_SAMPLES = None  # Строк в группе при адаптивной выборке; None - NUM_STRINGS_PER_GROUP
+
+# Контрольная точка: завершённые тесты сохраняются, прерванный прогон продолжается с --resume
+CHECKPOINT_FILE = ".checkpoint.jsonl"  # None - без контрольной точки
+
 # Конфигурация тестовых функций 
 NOISE_TESTS = [
     {
@@ -0,0 +1,224 @@
+import argparse
+import json
+import mmap
+import os
+import string
+import struct
+import time
+
+import numpy as np
+
+from color import *
+from config import GROUPS, NUM_STRINGS_PER_GROUP, CORPUS_ALPHABET, CORPUS_LENGTHS, CORPUS_LENGTH_SPREAD
+from noises import make_rng, spawn_seed
+
+# Ключ потока случайных чисел корпуса для spawn_seed (остальные потоки - в main.py)
+CORPUS_STREAM = 0
+
+CORPUS_MAGIC = b"RGBCORP1"
+# Магия и длина JSON-заголовка; дальше заголовок, затем по каждой группе смещения строк (int64) и байты строк
+CORPUS_HEADER = struct.Struct("<8sQ")
+CORPUS_ALIGN = 8
+
+ALPHABETS = {
+    "digits": string.digits,
+    "hex": string.digits + "abcdef",
+    "latin": string.ascii_lowercase,
+    "alnum": string.ascii_letters + string.digits,
+    "printable": string.ascii_letters + string.digits + string.punctuation,
+}
+
+
+class CorpusFormatError(ValueError):
+    pass
+
+
+def resolve_alphabet(alphabet):
+    """Таблица байт алфавита: имя из ALPHABETS или своя строка символов ASCII."""
+    symbols = ALPHABETS.get(alphabet, alphabet)
+    if not symbols or len(set(symbols)) != len(symbols):
+        raise ValueError(f"алфавит должен быть непустым и без повторов: {alphabet!r}")
+    try:
+        return np.frombuffer(symbols.encode("ascii"), dtype=np.uint8)
+    except UnicodeEncodeError:
+        # Один символ - один байт: на этом держится сборка строк через байтовое представление
+        raise ValueError(f"алфавит должен состоять из символов ASCII: {alphabet!r}") from None
+
+
+def fixed_lengths(length, count, generator, spread):
+    return np.full(count, length, dtype=np.int64)
+
+
+def uniform_lengths(length, count, generator, spread):
+    low = max(1, round(length * (1 - spread)))
+    high = max(low, round(length * (1 + spread)))
+    return generator.integers(low, high + 1, size=count, dtype=np.int64)
+
+
+def normal_lengths(length, count, generator, spread):
+    lengths = np.rint(generator.normal(length, length * spread, size=count)).astype(np.int64)
+    return np.maximum(lengths, 1)
+
+
+# Распределения длин строк группы вокруг её номинальной длины
+LENGTH_DISTRIBUTIONS = {
+    "fixed": fixed_lengths,
+    "uniform": uniform_lengths,
+    "normal": normal_lengths,
+}
+
+
+def generate_bytes(length, count, generator, alphabet="digits", lengths="fixed", spread=0.5):
+    """Строки группы одним массивом байт и смещения их начала (count + 1 значение)."""
+    table = resolve_alphabet(alphabet)
+    sizes = LENGTH_DISTRIBUTIONS[lengths](length, count, generator, spread)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    # Индексы uint8 подряд для всех строк - те же случайные числа, что давала построчная генерация цифр
+    indices = generator.integers(0, len(table), size=int(offsets[-1]), dtype=np.uint8)
+    return table[indices], offsets
+
+
+def split_strings(data, offsets):
+    # Символы ASCII, поэтому индекс в строке совпадает со смещением в байтах: одна декодировка на всю группу
+    text = data.tobytes().decode("ascii")
+    return [text[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def generate_strings(length, count, generator, alphabet="digits", lengths="fixed", spread=0.5):
+    return split_strings(*generate_bytes(length, count, generator, alphabet, lengths, spread))
+
+
+def aligned(size):
+    return -size % CORPUS_ALIGN
+
+
+class Corpus:
+    """Строки тестов по группам: байты и смещения лежат в одном буфере, строки собираются при обращении."""
+
+    def __init__(self, buffer, header, base):
+        self.buffer = buffer
+        self.info = header["info"]
+        self.index = {int(group): entry for group, entry in header["groups"].items()}
+        self.base = base
+
+    def __contains__(self, group):
+        return group in self.index
+
+    @property
+    def groups(self):
+        return list(self.index)
+
+    def count(self, group):
+        return self.index[group]["count"]
+
+    def arrays(self, group):
+        entry = self.index[group]
+        offsets = np.frombuffer(self.buffer, dtype=np.int64, count=entry["count"] + 1,
+                                offset=self.base + entry["offsets"])
+        data = np.frombuffer(self.buffer, dtype=np.uint8, count=int(offsets[-1]), offset=self.base + entry["data"])
+        return data, offsets
+
+    def strings(self, group, count=None):
+        data, offsets = self.arrays(group)
+        if count is not None:
+            offsets = offsets[:count + 1]
+            data = data[:offsets[-1]]
+        return split_strings(data, offsets)
+
+    def lengths(self, group):
+        return np.diff(self.arrays(group)[1])
+
+    @classmethod
+    def build(cls, groups, count, seed, alphabet="digits", lengths="fixed", spread=0.5):
+        # Те же потоки случайных чисел, что и в прогоне: корпус с seed S совпадает со строками прогона с SEED = S
+        parts = {}
+        for group in groups:
+            generator = make_rng(spawn_seed(seed, CORPUS_STREAM, group))
+            parts[group] = generate_bytes(group, count, generator, alphabet, lengths, spread)
+        info = {"seed": seed, "count": count, "alphabet": alphabet, "lengths": lengths, "spread": spread}
+        header, body = cls.layout(parts, info)
+        return cls(body, header, 0)
+
+    @staticmethod
+    def layout(parts, info):
+        chunks = []
+        position = 0
+        entries = {}
+        for group, (data, offsets) in parts.items():
+            entries[str(group)] = {"count": len(offsets) - 1, "offsets": position, "data": position + offsets.nbytes}
+            chunks.append(offsets.tobytes())
+            chunks.append(data.tobytes())
+            chunks.append(bytes(aligned(offsets.nbytes + data.nbytes)))
+            position += offsets.nbytes + data.nbytes + aligned(offsets.nbytes + data.nbytes)
+        return {"info": info, "groups": entries}, b"".join(chunks)
+
+    def save(self, path):
+        parts = {group: self.arrays(group) for group in self.index}
+        header, body = self.layout(parts, self.info)
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        header_bytes += b" " * aligned(CORPUS_HEADER.size + len(header_bytes))
+        with open(path, "wb") as f:
+            f.write(CORPUS_HEADER.pack(CORPUS_MAGIC, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(body)
+
+    @classmethod
+    def load(cls, path):
+        # Файл отображается в память: читается только заголовок, байты строк - при обращении к группе
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(buffer) < CORPUS_HEADER.size:
+            raise CorpusFormatError(f"{path}: файл слишком короткий")
+        magic, header_size = CORPUS_HEADER.unpack_from(buffer)
+        if magic != CORPUS_MAGIC:
+            raise CorpusFormatError(f"{path}: это не файл корпуса")
+        base = CORPUS_HEADER.size + header_size
+        header = json.loads(buffer[CORPUS_HEADER.size:base])
+        return cls(buffer, header, base)
+
+    def print_summary(self, path=None):
+        title = f"Корпус {path}" if path else "Корпус"
+        print(f"{COLOR_BOLD}{COLOR_CYAN}=== {title} ==={COLOR_RESET}")
+        info = self.info
+        print(f"seed {info['seed']}, алфавит {info['alphabet']}, длины {info['lengths']}"
+              + (f" (разброс {info['spread']:.0%})" if info["lengths"] != "fixed" else ""))
+        for group in self.index:
+            lengths = self.lengths(group)
+            print(f"{COLOR_BOLD}Группа {group}:{COLOR_RESET} {len(lengths)} строк, длина "
+                  f"{lengths.min()} / {lengths.mean():.0f} / {lengths.max()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сохранённые корпуса тестовых строк")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="сгенерировать корпус и сохранить в файл")
+    build.add_argument("output")
+    build.add_argument("--groups", type=int, nargs="+", default=GROUPS)
+    build.add_argument("--strings", type=int, default=NUM_STRINGS_PER_GROUP)
+    build.add_argument("--seed", type=int, help="по умолчанию случайный, выводится в консоль")
+    build.add_argument("--alphabet", default=CORPUS_ALPHABET, help=f"{', '.join(ALPHABETS)} или свои символы")
+    build.add_argument("--lengths", choices=LENGTH_DISTRIBUTIONS, default=CORPUS_LENGTHS)
+    build.add_argument("--spread", type=float, default=CORPUS_LENGTH_SPREAD)
+    info = commands.add_parser("info", help="состав сохранённого корпуса")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+        started = time.perf_counter()
+        corpus = Corpus.build(args.groups, args.strings, seed, args.alphabet, args.lengths, args.spread)
+        corpus.save(args.output)
+        print(f"{COLOR_GREEN}Корпус сохранён как: {os.path.abspath(args.output)} "
+              f"({os.path.getsize(args.output) / 1024 ** 2:.1f} МБ, {time.perf_counter() - started:.2f} с){COLOR_RESET}")
+        corpus.print_summary()
+    else:
+        started = time.perf_counter()
+        corpus = Corpus.load(args.path)
+        print(f"{COLOR_CYAN}Загрузка: {(time.perf_counter() - started) * 1000:.2f} мс{COLOR_RESET}")
+        corpus.print_summary(args.path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
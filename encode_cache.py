@@ -0,0 +1,80 @@
+import hashlib
+import os
+import threading
+
+from color import *
+
+
+class EncodeCache:
+    """Дисковый LRU-кэш WAV, полученных от /encode, с ключом по тексту и версии кодера."""
+
+    def __init__(self, directory, max_bytes, identity):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.identity = identity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".wav"))
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def path(self, text):
+        digest = hashlib.sha256(f"{self.identity}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.wav")
+
+    def get(self, text):
+        path = self.path(text)
+        try:
+            with open(path, "rb") as f:
+                wav_bytes = f.read()
+            # Время изменения файла служит отметкой последнего использования для LRU
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        return wav_bytes
+
+    def put(self, text, wav_bytes):
+        if len(wav_bytes) > self.max_bytes:
+            return
+
+        path = self.path(text)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(wav_bytes)
+
+        with self.lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self.size += len(wav_bytes) - old_size
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".wav")]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+
+        for entry in entries:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self.size -= size
+            self.evictions += 1
+
+    def print_summary(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        print(f"{COLOR_BOLD}Кэш /encode:{COLOR_RESET} {self.hits} попаданий, {self.misses} промахов ({hit_rate:.1%}), "
+              f"вытеснено {self.evictions}, занято {self.size / 1024 ** 2:.1f} МБ")
@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from datetime import datetime
+
+import aiohttp
+import numpy as np
+
+from color import *
+from config import NUM_STRINGS_PER_GROUP
+from main import (NOISE_CONFIGS, CLEAN_TEST_NAME, CORPUS_STREAM, TIMEOUT, RunContext, create_executor, encode_clean,
+                  configure_endpoints, ping_service, generate_random_digits_batch)
+from metrics import percentiles
+from noises import make_rng, spawn_seed
+from similarity import SUCCESS_THRESHOLD, calculate_similarity
+
+DEFAULT_LEVELS = {
+    "concurrency": [1, 2, 4, 8, 16, 32, 64],  # Число одновременных запросов на шаге
+    "rate": [5, 10, 20, 50, 100, 200],  # Частота поступления запросов на шаге, запр/с
+}
+
+
+async def build_corpus(ctx, group, num_strings):
+    # Корпус нагрузки - те же строки и шумы из NOISE_CONFIGS, что и в обычном прогоне
+    corpus_rng = make_rng(spawn_seed(ctx.seed, CORPUS_STREAM, group))
+    corpus = []
+    for i, original_text in enumerate(generate_random_digits_batch(group, num_strings, corpus_rng)):
+        payload, audio_normalized = await encode_clean(ctx, original_text, (group, i))
+        corpus.append((original_text, CLEAN_TEST_NAME, payload))
+        payloads = await asyncio.gather(
+            *(ctx.prepare_noised(audio_normalized, config, (group, i)) for config in NOISE_CONFIGS))
+        corpus.extend((original_text, config["name"], p) for config, p in zip(NOISE_CONFIGS, payloads))
+    return corpus
+
+
+class StepStats:
+    def __init__(self, level):
+        self.level = level
+        self.latencies = []
+        self.errors = 0
+        self.responses = []
+        self.started = time.perf_counter()
+        self.finished = self.started
+
+    async def send(self, ctx, item, scheduled=None):
+        # В открытом режиме задержка считается от запланированного момента, включая ожидание в очереди
+        started = scheduled if scheduled is not None else time.perf_counter()
+        original_text, _, payload = item
+        try:
+            decoded_text, _ = await ctx.decode(payload)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError, TypeError):
+            # Таймаут и тело без "text" под перегрузкой - такие же ошибки шага, как отказ соединения
+            self.errors += 1
+        else:
+            self.latencies.append(time.perf_counter() - started)
+            self.responses.append((original_text, decoded_text))
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        total = len(self.latencies) + self.errors
+        elapsed = max(self.finished - self.started, 1e-9)
+        # Точность считается после шага, чтобы расчёт сходства не нагружал цикл событий во время замера.
+        # Вне замера быстрый режим не нужен: верхние границы провалов исказили бы среднее сходство
+        scores = [calculate_similarity(original, decoded) for original, decoded in self.responses]
+        result = {
+            "level": self.level,
+            "requests": total,
+            "rps": len(self.latencies) / elapsed,
+            "error_rate": self.errors / total if total else 0.0,
+            "success_rate": sum(s >= SUCCESS_THRESHOLD for s in scores) / len(scores) if scores else 0.0,
+            "similarity": float(np.mean(scores)) if scores else 0.0,
+        }
+        if self.latencies:
+            result["latency"] = percentiles(self.latencies)
+        return result
+
+
+async def run_concurrency_step(ctx, corpus, level, duration):
+    stats = StepStats(level)
+    deadline = stats.started + duration
+    position = itertools.count()
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await stats.send(ctx, corpus[next(position) % len(corpus)])
+
+    await asyncio.gather(*(worker() for _ in range(level)))
+    return stats.summary()
+
+
+async def run_rate_step(ctx, corpus, level, duration, generator):
+    stats = StepStats(level)
+    tasks = []
+    scheduled = stats.started
+    i = 0
+    # Открытая модель: запросы поступают по пуассоновскому потоку и не ждут завершения предыдущих
+    while True:
+        scheduled += generator.exponential(1 / level)
+        if scheduled >= stats.started + duration:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(stats.send(ctx, corpus[i % len(corpus)], scheduled)))
+        i += 1
+
+    await asyncio.gather(*tasks)
+    return stats.summary()
+
+
+def find_knee(steps):
+    # Колено - шаг с максимальной "мощностью" Клейнрока: пропускная способность / медианная задержка
+    candidates = [s for s in steps if "latency" in s and s["latency"]["p50"] > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda s: s["rps"] / s["latency"]["p50"])
+
+
+def print_step(mode, step):
+    unit = "параллельно" if mode == "concurrency" else "запр/с"
+    error_color = COLOR_RED if step["error_rate"] > 0 else COLOR_GREEN
+    line = (f"{COLOR_BOLD}{step['level']:g} {unit}:{COLOR_RESET} {step['rps']:.1f} запр/с, "
+            f"ошибки {error_color}{step['error_rate']:.1%}{COLOR_RESET}")
+    if "latency" in step:
+        p = step["latency"]
+        line += f", задержка {p['p50'] * 1000:.1f} / {p['p95'] * 1000:.1f} / {p['p99'] * 1000:.1f} мс"
+    line += f", успешных {step['success_rate']:.1%}"
+    print(line)
+
+
+async def run_load(session, healthy_urls, mode, levels, duration, group, num_strings, max_error_rate):
+    with create_executor() as executor:
+        ctx = RunContext(session, executor)
+        await configure_endpoints(ctx, healthy_urls)
+        # Под нагрузкой нужна доля ошибок самого сервера, без повторов и дублей
+        ctx.policy.max_retries = 0
+        ctx.policy.hedge = False
+        print(f"{COLOR_CYAN}Передача аудио: {ctx.transport}, seed: {ctx.seed}{COLOR_RESET}")
+
+        corpus = await build_corpus(ctx, group, num_strings)
+        print(f"{COLOR_CYAN}Корпус: {len(corpus)} запросов /decode, группа {group} символов{COLOR_RESET}")
+
+    generator = make_rng(spawn_seed(ctx.seed, 0xA11))
+    print(f"\n{COLOR_BOLD}{COLOR_CYAN}=== Нагрузка, шаг {duration} с, задержка p50 / p95 / p99 ==={COLOR_RESET}")
+    steps = []
+    try:
+        for level in levels:
+            if mode == "concurrency":
+                step = await run_concurrency_step(ctx, corpus, level, duration)
+            else:
+                step = await run_rate_step(ctx, corpus, level, duration, generator)
+            steps.append(step)
+            print_step(mode, step)
+            if step["error_rate"] > max_error_rate:
+                print(f"{COLOR_YELLOW}Доля ошибок выше {max_error_rate:.0%}, нагрузка дальше не повышается{COLOR_RESET}")
+                break
+    finally:
+        ctx.endpoints.close()
+
+    knee = find_knee(steps)
+    if knee:
+        best = max(steps, key=lambda s: s["rps"])
+        print(f"\n{COLOR_GREEN}Колено: {knee['level']:g} ({knee['rps']:.1f} запр/с, "
+              f"p50 {knee['latency']['p50'] * 1000:.1f} мс){COLOR_RESET}")
+        print(f"{COLOR_BOLD}Максимум пропускной способности:{COLOR_RESET} {best['rps']:.1f} запр/с "
+              f"на шаге {best['level']:g}")
+    return {"mode": mode, "group": group, "duration": duration, "seed": ctx.seed, "steps": steps,
+            "knee": knee["level"] if knee else None}
+
+
+def save_load_results(data, filename=None):
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        filename = f"load_results_{timestamp}.json"
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    print(f"{COLOR_GREEN}Результаты нагрузки сохранены как: {os.path.abspath(filename)}{COLOR_RESET}")
+
+
+async def main(args):
+    # Пул соединений не должен ограничивать нагрузку сильнее, чем сам шаг
+    connector = aiohttp.TCPConnector(limit=args.max_connections)
+    async with aiohttp.ClientSession(timeout=TIMEOUT, connector=connector) as session:
+        healthy_urls = await ping_service(session)
+        if healthy_urls:
+            data = await run_load(session, healthy_urls, args.mode, args.levels or DEFAULT_LEVELS[args.mode], args.duration,
+                                  args.group, args.strings, args.max_error_rate)
+            save_load_results(data, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочное тестирование /decode: пропускная способность и задержки")
+    parser.add_argument("--mode", choices=DEFAULT_LEVELS, default="concurrency",
+                        help="concurrency - ступени параллелизма, rate - открытый поток с заданной частотой")
+    parser.add_argument("--levels", type=float, nargs="+", help="ступени параллелизма или частоты, запр/с")
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность шага, с")
+    parser.add_argument("--group", type=int, default=100, help="длина строк корпуса")
+    parser.add_argument("--strings", type=int, default=NUM_STRINGS_PER_GROUP)
+    parser.add_argument("--max-error-rate", type=float, default=0.5)
+    parser.add_argument("--max-connections", type=int, default=256)
+    parser.add_argument("--output", help="файл JSON с результатами")
+    args = parser.parse_args()
+    if args.mode == "concurrency" and args.levels:
+        args.levels = [int(level) for level in args.levels]
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        print(f"\n{COLOR_RED}{COLOR_BOLD}Нагрузка прервана пользователем.{COLOR_RESET}")
@@ -1,15 +1,31 @@
 import base64
+import binascii
+import functools
 import io
 import asyncio
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 import aiohttp
-from Levenshtein import distance as levenshtein_distance
-import scipy.io.wavfile as wavfile
 import numpy as np
 
 from config import *
 from color import *
-from html import generate_html_report
+from report import generate_html_report
+from metrics import StageTimer, timed
+from encode_cache import EncodeCache
+from noise_engine import apply_family
+from streaming import stream_payload
+from similarity import SUCCESS_THRESHOLD, calculate_similarity, bounded_similarity, batch_similarity
+from results_log import ResultLog
+from checkpoint import Checkpoint
+from balancer import EndpointPool
+from request_policy import RequestPolicy
+from corpus import CORPUS_STREAM, Corpus, generate_strings
+from sampling import AdaptiveSampler
+from wav_codec import encode_wav, encode_wav_json, decode_wav, JsonAudioBody, UnsupportedWavFormat
 
 
 BASE_URL = "http://localhost:8000"
@@ -17,7 +33,15 @@ BASE_URL = "http://localhost:8000"
 MAX_PING_ATTEMPTS = 5
 PING_INTERVAL = 1
 
-TIMEOUT = aiohttp.ClientTimeout(total=60)
+# Общий предел сессии; таймаут каждого запроса задаёт RequestPolicy по размеру и задержкам
+TIMEOUT = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_MAX)
+PING_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+CLEAN_TEST_NAME = "Чистый сигнал"
+
+# Ключи независимых потоков случайных чисел для spawn_seed (CORPUS_STREAM = 0 - в corpus.py)
+NOISE_STREAM = 1
+FAMILY_STREAM = 2
 
 
 def generate_test_configs(tests):
@@ -32,6 +56,7 @@ def generate_test_configs(tests):
             color = DIFFICULTY_COLORS.get(difficulty, COLOR_WHITE)
 
             configs.append({
+                "index": len(configs),
                 "name": test["name"],
                 "func": test["func"],
                 "params": params,
@@ -46,52 +71,131 @@ NOISE_CONFIGS = generate_test_configs(NOISE_TESTS)
 TOTAL_TESTS_PER_STRING = 1 + len(NOISE_CONFIGS)
 
 
-async def ping_service(session):
-    print(f"{COLOR_CYAN}Проверка доступности сервера {BASE_URL}...{COLOR_RESET}")
+def endpoint_urls():
+    return ENDPOINTS or [BASE_URL]
+
+
+async def ping_endpoint(session, base_url):
+    print(f"{COLOR_CYAN}Проверка доступности сервера {base_url}...{COLOR_RESET}")
     for attempt in range(1, MAX_PING_ATTEMPTS + 1):
         try:
-            async with session.get(f"{BASE_URL}/ping") as response:
+            async with session.get(f"{base_url}/ping", timeout=PING_TIMEOUT) as response:
                 if response.status == 200:
-                    print(f"{COLOR_GREEN}Сервер доступен!{COLOR_RESET}")
+                    print(f"{COLOR_GREEN}Сервер {base_url} доступен!{COLOR_RESET}")
                     return True
                 else:
                     print(
-                        f"{COLOR_YELLOW}Попытка {attempt}/{MAX_PING_ATTEMPTS}: Сервер вернул статус {response.status}{COLOR_RESET}")
+                        f"{COLOR_YELLOW}Попытка {attempt}/{MAX_PING_ATTEMPTS} ({base_url}): Сервер вернул статус {response.status}{COLOR_RESET}")
         except aiohttp.ClientError as e:
             print(
-                f"{COLOR_YELLOW}Попытка {attempt}/{MAX_PING_ATTEMPTS}: Ошибка подключения - {str(e)}{COLOR_RESET}")
+                f"{COLOR_YELLOW}Попытка {attempt}/{MAX_PING_ATTEMPTS} ({base_url}): Ошибка подключения - {str(e)}{COLOR_RESET}")
+        except asyncio.TimeoutError:
+            print(
+                f"{COLOR_YELLOW}Попытка {attempt}/{MAX_PING_ATTEMPTS} ({base_url}): Нет ответа за {PING_TIMEOUT.total:g} сек{COLOR_RESET}")
 
         if attempt < MAX_PING_ATTEMPTS:
             print(
                 f"{COLOR_YELLOW}Повторная попытка через {PING_INTERVAL} сек...{COLOR_RESET}")
             await asyncio.sleep(PING_INTERVAL)
 
-    print(f"{COLOR_RED}⚠️  Сервер не ответил после {MAX_PING_ATTEMPTS} попыток. Тесты отменены.{COLOR_RESET}")
+    print(f"{COLOR_RED}⚠️  Сервер {base_url} не ответил после {MAX_PING_ATTEMPTS} попыток.{COLOR_RESET}")
     return False
 
 
-def generate_random_digits_batch(length, count):
-    digits = rng.integers(0, 10, size=(count, length), dtype=np.uint8)
-    return [''.join(digits[i].astype(str)) for i in range(count)]
+async def ping_service(session):
+    # Возвращает адреса доступных серверов; пустой список - тесты отменяются
+    urls = endpoint_urls()
+    available = await asyncio.gather(*(ping_endpoint(session, url) for url in urls))
+    healthy = [url for url, ok in zip(urls, available) if ok]
+    if not healthy:
+        print(f"{COLOR_RED}⚠️  Ни один сервер не доступен. Тесты отменены.{COLOR_RESET}")
+    return healthy
+
+
+async def probe_endpoint(session, base_url):
+    # Однократная проверка исключённого сервера перед возвратом в работу
+    try:
+        async with session.get(f"{base_url}/ping", timeout=PING_TIMEOUT) as response:
+            return response.status == 200
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return False
+
+
+def generate_random_digits_batch(length, count, generator=rng):
+    return generate_strings(length, count, generator)
+
+
+def audio_to_wav_bytes(audio):
+    return encode_wav(audio)
+
+
+def wav_bytes_to_audio(wav_bytes):
+    try:
+        return decode_wav(wav_bytes)
+    except UnsupportedWavFormat:
+        # Не PCM16 моно (float, стерео) - такой WAV по-прежнему разбирает scipy, он грузится только здесь
+        from scipy.io import wavfile
+
+        with io.BytesIO(wav_bytes) as wav_buffer:
+            _, audio = wavfile.read(wav_buffer)
+        return audio
 
 
 def audio_to_base64(audio):
-    buffer = io.BytesIO()
-    wavfile.write(buffer, 44_100, audio)
-    wav_bytes = buffer.getvalue()
+    wav_bytes = audio_to_wav_bytes(audio)
     return base64.b64encode(wav_bytes).decode('utf-8')
 
 
+def audio_to_json_body(audio):
+    return encode_wav_json(audio)
+
+
 def base64_to_audio(b64_string):
-    wav_bytes = base64.b64decode(b64_string)
-    with io.BytesIO(wav_bytes) as wav_buffer:
-        _, audio = wavfile.read(wav_buffer)
-    return audio
+    wav_bytes = binascii.a2b_base64(b64_string)
+    return wav_bytes_to_audio(wav_bytes)
+
+
+async def fetch_ping_info(session, base_url=BASE_URL):
+    try:
+        async with session.get(f"{base_url}/ping", timeout=PING_TIMEOUT) as response:
+            data = await response.json(content_type=None)
+        if isinstance(data, dict):
+            return data
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        pass
+    return {}
+
 
+def detect_transport(ping_info):
+    if AUDIO_TRANSPORT != "auto":
+        return AUDIO_TRANSPORT
+    return "binary" if ping_info.get("binary_audio") else "json"
 
-async def encode_string(session, text):
+
+def encoder_identity(ping_info):
+    # Без версии кодера в /ping новая сборка по тому же адресу получила бы WAV прежней - такой кэш не нужен
+    if "encoder" in ping_info or "version" in ping_info:
+        return f"{ping_info.get('encoder', '')}:{ping_info.get('version', '')}"
+    return None
+
+
+async def configure_endpoints(ctx, healthy_urls):
+    # Бинарный WAV включается, только если его поддерживают все доступные серверы
+    ping_infos = await asyncio.gather(*(fetch_ping_info(ctx.session, url) for url in healthy_urls))
+    transports = {detect_transport(info) for info in ping_infos}
+    ctx.transport = "binary" if transports == {"binary"} else "json"
+    for endpoint in ctx.endpoints.endpoints:
+        if endpoint.url not in healthy_urls:
+            ctx.endpoints.eject(endpoint)
+    identities = {encoder_identity(info) for info in ping_infos}
+    if None in identities:
+        return None
+    return "|".join(sorted(identities))
+
+
+async def encode_string(session, text, base_url=BASE_URL):
     async with session.post(
-        f"{BASE_URL}/encode",
+        f"{base_url}/encode",
         json={"text": text}
     ) as response:
         response.raise_for_status()
@@ -99,9 +203,9 @@ async def encode_string(session, text):
         return data["data"]
 
 
-async def decode_audio(session, audio_base64):
+async def decode_audio(session, audio_base64, base_url=BASE_URL):
     async with session.post(
-        f"{BASE_URL}/decode",
+        f"{base_url}/decode",
         json={"data": audio_base64}
     ) as response:
         response.raise_for_status()
@@ -109,12 +213,106 @@ async def decode_audio(session, audio_base64):
         return data["text"]
 
 
-def calculate_similarity(original, decoded):
-    if not original:
-        return 0.0
-    max_len = max(len(original), len(decoded))
-    lev_dist = levenshtein_distance(original, decoded)
-    return 1.0 - (lev_dist / max_len)
+async def decode_audio_body(session, body, base_url=BASE_URL):
+    # Тело JSON уже собрано кодеком WAV, aiohttp отправляет его без json.dumps
+    async with session.post(
+        f"{base_url}/decode",
+        data=body,
+        headers={"Content-Type": "application/json"}
+    ) as response:
+        response.raise_for_status()
+        data = await response.json()
+        return data["text"]
+
+
+async def encode_string_binary(session, text, base_url=BASE_URL):
+    async with session.post(
+        f"{base_url}/encode",
+        json={"text": text},
+        headers={"Accept": "audio/wav"}
+    ) as response:
+        response.raise_for_status()
+        if response.content_type == "audio/wav":
+            return await response.read()
+        # Сервер проигнорировал Accept и ответил в JSON
+        data = await response.json()
+        return base64.b64decode(data["data"])
+
+
+async def decode_audio_batch(session, audio_base64_list, base_url=BASE_URL):
+    async with session.post(
+        f"{base_url}/decode_batch",
+        json={"data": audio_base64_list}
+    ) as response:
+        response.raise_for_status()
+        data = await response.json()
+        texts = data["texts"]
+    if len(texts) != len(audio_base64_list):
+        raise ValueError(f"/decode_batch вернул {len(texts)} результатов вместо {len(audio_base64_list)}")
+    return texts
+
+
+async def decode_audio_stream(session, chunks, content_length, content_type, base_url=BASE_URL):
+    async with session.post(
+        f"{base_url}/decode",
+        data=chunks,
+        headers={"Content-Type": content_type, "Content-Length": str(content_length)}
+    ) as response:
+        response.raise_for_status()
+        data = await response.json()
+        return data["text"]
+
+
+async def decode_audio_binary(session, wav_bytes, base_url=BASE_URL):
+    async with session.post(
+        f"{base_url}/decode",
+        data=wav_bytes,
+        headers={"Content-Type": "audio/wav"}
+    ) as response:
+        response.raise_for_status()
+        data = await response.json()
+        return data["text"]
+
+
+def fast_similarity(original_text):
+    # На коротких строках граница почти не ускоряет расчёт, а точное сходство нужно для цвета и отчёта
+    return FAST_SIMILARITY and len(original_text) >= FAST_SIMILARITY_MIN_LENGTH
+
+
+def score_decoded(original_text, decoded_text, similarity=None):
+    if similarity is None:
+        if fast_similarity(original_text):
+            similarity = bounded_similarity(original_text, decoded_text)
+        else:
+            similarity = (calculate_similarity(original_text, decoded_text), True)
+    similarity, exact = similarity
+
+    result = {
+        "decoded": decoded_text,
+        "similarity": similarity,
+        "success": similarity >= 0.9
+    }
+    if not exact:
+        result["similarity_exact"] = False
+    return result
+
+
+def score_decoded_batch(original_text, decoded_texts):
+    if not fast_similarity(original_text):
+        return [score_decoded(original_text, decoded_text) for decoded_text in decoded_texts]
+    similarities = batch_similarity(original_text, decoded_texts)
+    return [score_decoded(original_text, d, sim) for d, sim in zip(decoded_texts, similarities)]
+
+
+def similarity_mark(result):
+    return "≤" if result.get("similarity_exact", True) is False else ""
+
+
+def color_for_result(result):
+    # Для неуспешного теста в быстром режиме известна лишь верхняя граница (около 89.9%): это провал, а не "почти"
+    if result.get("similarity_exact", True) is False:
+        return COLOR_RED
+    return get_color_for_percent(result["similarity"])
 
 
 def normalize_audio(audio):
@@ -123,8 +321,18 @@ def normalize_audio(audio):
     return audio
 
 
-def denormalize_audio(audio_float):
-    return (np.clip(audio_float, -1.0, 1.0) * 32767.0).astype(np.int16)
+def denormalize_audio(audio_float, out=None):
+    if out is None:
+        return (np.clip(audio_float, -1.0, 1.0) * 32767.0).astype(np.int16)
+    # С буфером out масштабирование идёт на месте, audio_float портится
+    np.clip(audio_float, -1.0, 1.0, out=audio_float)
+    audio_float *= 32767.0
+    np.copyto(out, audio_float, casting="unsafe")
+    return out
+
+
+def parse_normalized(parse, payload):
+    return normalize_audio(parse(payload))
 
 
 def get_color_for_percent(percent):
@@ -138,7 +346,488 @@ def get_color_for_percent(percent):
         return COLOR_RED
 
 
-async def run_tests(session):
+def create_executor():
+    if EXECUTOR_MODE == "process":
+        return ProcessPoolExecutor(max_workers=EXECUTOR_WORKERS)
+    return ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS)
+
+
+def prepare_noised_audio(audio_normalized, func, params, serialize, seed_sequence=None):
+    started = time.perf_counter()
+    # Буферы потока переиспользуются между тестами, чистый сигнал не копируется
+    workspace = get_workspace()
+    length = len(audio_normalized)
+    audio_noised_float = func(audio_normalized, generator=make_rng(seed_sequence),
+                              out=workspace.buffer("out", length), scratch=workspace.buffer("scratch", length),
+                              **params)
+    audio_noised = denormalize_audio(audio_noised_float, out=workspace.buffer("pcm", length, np.int16))
+    noised = time.perf_counter()
+    payload = serialize(audio_noised)
+
+    return payload, {
+        "noise": noised - started,
+        "serialize": time.perf_counter() - noised
+    }
+
+
+def prepare_family_audio(audio_normalized, func, params_list, serialize, seed_sequence=None):
+    started = time.perf_counter()
+    audio_noised = apply_family(audio_normalized, func, params_list, make_rng(seed_sequence))
+    noised = time.perf_counter()
+    payloads = [serialize(row) for row in audio_noised]
+
+    return payloads, {
+        "noise": noised - started,
+        "serialize": time.perf_counter() - noised
+    }
+
+
+class RunContext:
+    def __init__(self, session, executor):
+        self.session = session
+        self.executor = executor
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.timer = StageTimer()
+        self.transport = "json"
+        self.batch_size = DECODE_BATCH_SIZE
+        self.encode_cache = None
+        self.result_log = None
+        self.checkpoint = None
+        self.corpus = None
+        self.sampler = None
+        self.endpoints = EndpointPool(endpoint_urls(), functools.partial(probe_endpoint, session),
+                                      ENDPOINT_EJECT_AFTER, ENDPOINT_EJECT_SECONDS)
+        self.policy = RequestPolicy(
+            REQUEST_TIMEOUT_BASE, REQUEST_TIMEOUT_PER_MB, REQUEST_TIMEOUT_MIN, REQUEST_TIMEOUT_MAX,
+            REQUEST_TIMEOUT_P99_FACTOR, REQUEST_RETRIES, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX,
+            HEDGE_REQUESTS, HEDGE_PERCENTILE)
+        self.seed = SEED if SEED is not None else np.random.SeedSequence().entropy
+
+    @property
+    def serialize(self):
+        return audio_to_wav_bytes if self.transport == "binary" else audio_to_json_body
+
+    @property
+    def parse(self):
+        return wav_bytes_to_audio if self.transport == "binary" else base64_to_audio
+
+    async def run_cpu(self, stage, func, *args):
+        loop = asyncio.get_running_loop()
+        result, seconds = await loop.run_in_executor(self.executor, timed, func, *args)
+        self.timer.add(stage, seconds)
+        return result
+
+    async def run_io(self, stage, func, *args):
+        # Файловый ввод-вывод всегда в потоках по умолчанию: EncodeCache с блокировкой нельзя передать в процесс
+        loop = asyncio.get_running_loop()
+        result, seconds = await loop.run_in_executor(None, timed, func, *args)
+        self.timer.add(stage, seconds)
+        return result
+
+    async def prepare_noised(self, audio_normalized, config, string_key):
+        loop = asyncio.get_running_loop()
+        seed_sequence = spawn_seed(self.seed, NOISE_STREAM, *string_key, config["index"])
+        payload, stages = await loop.run_in_executor(
+            self.executor, prepare_noised_audio, audio_normalized, config["func"], config["params"], self.serialize,
+            seed_sequence)
+        for stage, seconds in stages.items():
+            self.timer.add(stage, seconds)
+        return payload
+
+    async def iterate_in_executor(self, chunks):
+        # Генератор не переносится между процессами, поэтому блоки считаются в потоках
+        executor = self.executor if isinstance(self.executor, ThreadPoolExecutor) else None
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk, seconds = await loop.run_in_executor(executor, timed, next, chunks, None)
+            self.timer.add("stream", seconds)
+            if chunk is None:
+                break
+            yield chunk
+
+    async def request(self, kind, key, size, send):
+        # Запросы кодека идемпотентны: повтор и дубль безопасны, send создаёт новую попытку
+        group = key[0] if key else None
+        return await self.policy.call(self.endpoints, kind, group, size, send)
+
+    async def decode_stream(self, audio_normalized, config, string_key):
+        def stream():
+            # Генератор блоков одноразовый, поэтому для каждой попытки поток шума создаётся заново из seed
+            generator = make_rng(spawn_seed(self.seed, NOISE_STREAM, *string_key, config["index"]))
+            return stream_payload(audio_normalized, config["func"], config["params"], generator, STREAM_BLOCK_SIZE,
+                                  self.transport)
+
+        def send(endpoint):
+            chunks, content_length, content_type = stream()
+            return decode_audio_stream(self.session, self.iterate_in_executor(chunks), content_length, content_type,
+                                       endpoint.url)
+
+        _, content_length, _ = stream()
+        key = (string_key[0], config["name"])
+        self.timer.add_bytes("decode", content_length, key)
+        with self.timer.measure("decode", key):
+            return await self.request("decode", key, content_length, send)
+
+    async def prepare_family(self, audio_normalized, configs, string_key):
+        loop = asyncio.get_running_loop()
+        seed_sequence = spawn_seed(self.seed, FAMILY_STREAM, *string_key, configs[0]["index"])
+        payloads, stages = await loop.run_in_executor(
+            self.executor, prepare_family_audio, audio_normalized, configs[0]["func"],
+            [config["params"] for config in configs], self.serialize, seed_sequence)
+        for stage, seconds in stages.items():
+            self.timer.add(stage, seconds)
+        return payloads
+
+    async def encode(self, text, key=None):
+        if self.encode_cache:
+            wav_bytes = await self.run_io("cache", self.encode_cache.get, text)
+            if wav_bytes is not None:
+                if self.transport == "binary":
+                    return wav_bytes
+                return base64.b64encode(wav_bytes).decode('utf-8')
+
+        encode = encode_string_binary if self.transport == "binary" else encode_string
+        with self.timer.measure("encode", key):
+            payload, _ = await self.request("encode", key, len(text),
+                                            lambda endpoint: encode(self.session, text, endpoint.url))
+        self.timer.add_bytes("encode", len(payload))
+
+        if self.encode_cache:
+            wav_bytes = payload if isinstance(payload, bytes) else base64.b64decode(payload)
+            await self.run_io("cache", self.encode_cache.put, text, wav_bytes)
+        return payload
+
+    async def decode(self, payload, key=None):
+        self.timer.add_bytes("decode", len(payload), key)
+        with self.timer.measure("decode", key):
+            if isinstance(payload, str):
+                return await self.request("decode", key, len(payload),
+                                          lambda endpoint: decode_audio(self.session, payload, endpoint.url))
+            if isinstance(payload, JsonAudioBody):
+                return await self.request("decode", key, len(payload),
+                                          lambda endpoint: decode_audio_body(self.session, payload, endpoint.url))
+            try:
+                return await self.request("decode", key, len(payload),
+                                          lambda endpoint: decode_audio_binary(self.session, payload, endpoint.url))
+            except aiohttp.ClientResponseError as e:
+                if e.status != 415:
+                    raise
+        # Сервер не принимает audio/wav - переходим на JSON до конца прогона
+        print(f"\n{COLOR_YELLOW}Сервер не поддерживает audio/wav, переход на JSON{COLOR_RESET}")
+        self.transport = "json"
+        return await self.decode(base64.b64encode(payload).decode('utf-8'), key)
+
+    async def decode_batch(self, payloads, keys):
+        if self.batch_size > 1:
+            # Пакетный запрос всегда идёт в JSON, бинарные WAV переводятся в base64
+            items = [batch_item(p) for p in payloads]
+            self.timer.add_bytes("decode_batch", sum(len(item) for item in items))
+            started = time.perf_counter()
+            try:
+                with self.timer.measure("decode_batch"):
+                    texts, endpoint = await self.request(
+                        "decode_batch", keys[0], sum(len(item) for item in items),
+                        lambda endpoint: decode_audio_batch(self.session, items, endpoint.url))
+                # Задержка пакетного запроса засчитывается каждому тесту пакета
+                elapsed = time.perf_counter() - started
+                for item, key in zip(items, keys):
+                    self.timer.record("decode_batch", key, elapsed)
+                    self.timer.payload_sizes[key].append(len(item))
+                return [(text, endpoint) for text in texts]
+            except aiohttp.ClientResponseError as e:
+                if e.status not in (404, 405, 501):
+                    raise
+            if self.batch_size > 1:
+                print(f"\n{COLOR_YELLOW}Сервер не поддерживает /decode_batch, переход на одиночные запросы{COLOR_RESET}")
+                self.batch_size = 1
+
+        return [await self.decode(payload, key) for payload, key in zip(payloads, keys)]
+
+
+def batch_item(payload):
+    if isinstance(payload, str):
+        return payload
+    if isinstance(payload, JsonAudioBody):
+        return payload.base64_text()
+    return base64.b64encode(payload).decode('utf-8')
+
+
+async def encode_clean(ctx, text, string_key):
+    async with ctx.semaphore:
+        payload = await ctx.encode(text, (string_key[0], None))
+    # Чистый сигнал нормализуется один раз на строку и используется всеми тестами шума
+    return payload, await ctx.run_cpu("parse", parse_normalized, ctx.parse, payload)
+
+
+async def run_clean_test(ctx, encoded, original_text, string_key):
+    payload, _ = await encoded
+    async with ctx.semaphore:
+        decoded_text, endpoint = await ctx.decode(payload, (string_key[0], CLEAN_TEST_NAME))
+    result = await ctx.run_cpu("similarity", score_decoded, original_text, decoded_text)
+    ctx.endpoints.record_score(endpoint, result["success"])
+    return result
+
+
+def new_test_result(config):
+    return {
+        "name": config["name"],
+        "params": config["params_str"],
+        "difficulty": config["difficulty"],
+        "color": config["color"]
+    }
+
+
+async def prepare_family(ctx, encoded, configs, string_key):
+    _, audio_normalized = await encoded
+    payloads = await ctx.prepare_family(audio_normalized, configs, string_key)
+    return {config["index"]: payload for config, payload in zip(configs, payloads)}
+
+
+async def noised_payload(ctx, audio_normalized, config, string_key, families):
+    if families:
+        return (await families[config["name"]])[config["index"]]
+    return await ctx.prepare_noised(audio_normalized, config, string_key)
+
+
+def should_stream(audio_normalized):
+    return STREAM_MIN_SAMPLES is not None and audio_normalized.ndim == 1 and len(audio_normalized) >= STREAM_MIN_SAMPLES
+
+
+async def run_noise_test(ctx, encoded, original_text, string_key, families, config):
+    test_result = new_test_result(config)
+
+    try:
+        _, audio_normalized = await encoded
+        async with ctx.semaphore:
+            started = time.perf_counter()
+            if not families and should_stream(audio_normalized):
+                decoded_text, endpoint = await ctx.decode_stream(audio_normalized, config, string_key)
+            else:
+                payload = await noised_payload(ctx, audio_normalized, config, string_key, families)
+                decoded_text, endpoint = await ctx.decode(payload, (string_key[0], config["name"]))
+            ctx.timer.record("test", (string_key[0], config["name"]), time.perf_counter() - started)
+        test_result.update(await ctx.run_cpu("similarity", score_decoded, original_text, decoded_text))
+        ctx.endpoints.record_score(endpoint, test_result["success"])
+    except Exception as e:
+        test_result["error"] = str(e)
+
+    return test_result
+
+
+async def run_noise_batch(ctx, encoded, original_text, string_key, families, configs):
+    test_results = [new_test_result(config) for config in configs]
+
+    try:
+        _, audio_normalized = await encoded
+        async with ctx.semaphore:
+            payloads = await asyncio.gather(
+                *(noised_payload(ctx, audio_normalized, config, string_key, families) for config in configs),
+                return_exceptions=True
+            )
+            prepared = [i for i, payload in enumerate(payloads) if not isinstance(payload, Exception)]
+            keys = [(string_key[0], configs[i]["name"]) for i in prepared]
+            decoded = await ctx.decode_batch([payloads[i] for i in prepared], keys) if prepared else []
+
+        for i, payload in enumerate(payloads):
+            if isinstance(payload, Exception):
+                test_results[i]["error"] = str(payload)
+
+        scores = await ctx.run_cpu("similarity", score_decoded_batch, original_text, [text for text, _ in decoded])
+        for i, score, (_, endpoint) in zip(prepared, scores, decoded):
+            test_results[i].update(score)
+            ctx.endpoints.record_score(endpoint, score["success"])
+    except Exception as e:
+        for test_result in test_results:
+            if "error" not in test_result and "decoded" not in test_result:
+                test_result["error"] = str(e)
+
+    return test_results
+
+
+async def take_result(batch_task, index):
+    return (await batch_task)[index]
+
+
+def schedule_test(ctx, string_key, test, factory):
+    # Тест, завершённый до прерывания, берётся из контрольной точки без запросов к серверу
+    saved = ctx.checkpoint.result(*string_key, test) if ctx.checkpoint else None
+    if saved is not None:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(saved)
+        return future
+
+    task = asyncio.ensure_future(factory())
+    if ctx.checkpoint:
+        task.add_done_callback(functools.partial(ctx.checkpoint.on_done, string_key, test))
+    return task
+
+
+def schedule_string(ctx, grouped_configs, original_text, string_key):
+    # Все тесты строки запускаются сразу, число запросов ограничивает ctx.semaphore
+    def is_pending(test):
+        return not (ctx.checkpoint and ctx.checkpoint.result(*string_key, test) is not None)
+
+    def is_active(test):
+        # Тест, остановленный адаптивной выборкой, в следующие строки не попадает
+        return ctx.sampler is None or ctx.sampler.active(string_key[0], test)
+
+    active_configs = {base_name: [config for config in group_configs if is_active(config["index"])]
+                      for base_name, group_configs in grouped_configs.items()}
+    active_configs = {base_name: configs for base_name, configs in active_configs.items() if configs}
+    pending = [config for configs in active_configs.values() for config in configs if is_pending(config["index"])]
+    pending_indexes = {config["index"] for config in pending}
+    run_clean = is_active("clean")
+    # Строка кодируется, только если после контрольной точки у неё остались тесты
+    encoded = None
+    if pending or (run_clean and is_pending("clean")):
+        encoded = asyncio.ensure_future(encode_clean(ctx, original_text, string_key))
+    clean_task = None
+    if run_clean:
+        clean_task = schedule_test(ctx, string_key, "clean",
+                                   lambda: run_clean_test(ctx, encoded, original_text, string_key))
+
+    families = {}
+    if VECTORIZED_NOISE:
+        for base_name, group_configs in grouped_configs.items():
+            if any(config["index"] in pending_indexes for config in group_configs):
+                families[base_name] = asyncio.ensure_future(prepare_family(ctx, encoded, group_configs, string_key))
+
+    noise_tasks = {}
+    if ctx.batch_size > 1:
+        # Варианты строки делятся на пакеты, каждый тест получает свой результат из пакета
+        batch_tasks = [
+            asyncio.ensure_future(run_noise_batch(ctx, encoded, original_text, string_key, families, pending[start:start + ctx.batch_size]))
+            for start in range(0, len(pending), ctx.batch_size)
+        ]
+        positions = {config["index"]: i for i, config in enumerate(pending)}
+        for base_name, group_configs in active_configs.items():
+            noise_tasks[base_name] = []
+            for config in group_configs:
+                position = positions.get(config["index"], 0)
+                batch_task = batch_tasks[position // ctx.batch_size] if batch_tasks else None
+                noise_tasks[base_name].append((config, schedule_test(
+                    ctx, string_key, config["index"],
+                    lambda batch_task=batch_task, position=position: take_result(batch_task, position % ctx.batch_size))))
+    else:
+        for base_name, group_configs in active_configs.items():
+            noise_tasks[base_name] = [
+                (config, schedule_test(ctx, string_key, config["index"],
+                                       lambda config=config: run_noise_test(ctx, encoded, original_text, string_key,
+                                                                            families, config)))
+                for config in group_configs
+            ]
+
+    return clean_task, noise_tasks
+
+
+def checkpoint_info(ctx):
+    # Продолжать можно только прогон с теми же группами, числом строк, набором шумов
+    # и настройками, от которых зависят шум и оценка результатов
+    return {
+        "groups": GROUPS,
+        "strings": strings_per_group(),
+        "configs": [f"{config['name']}: {config['params_str']}" for config in NOISE_CONFIGS],
+        "corpus": CORPUS_FILE or [CORPUS_ALPHABET, CORPUS_LENGTHS, CORPUS_LENGTH_SPREAD],
+        "sampling": [ADAPTIVE_CONFIDENCE, ADAPTIVE_PRECISION, ADAPTIVE_MIN_SAMPLES] if ADAPTIVE_SAMPLING else None,
+        "noise": [VECTORIZED_NOISE, STREAM_MIN_SAMPLES, STREAM_BLOCK_SIZE],
+        "similarity": FAST_SIMILARITY_MIN_LENGTH if FAST_SIMILARITY else None,
+        "transport": ctx.transport,
+    }
+
+
+def open_checkpoint(ctx, resume):
+    checkpoint = Checkpoint(CHECKPOINT_FILE)
+    if resume:
+        if checkpoint.load(checkpoint_info(ctx)):
+            # Все потоки случайных чисел выводятся из seed, поэтому его достаточно для продолжения
+            ctx.seed = checkpoint.seed
+            print(f"{COLOR_CYAN}Продолжение прогона: {len(checkpoint.completed)} тестов уже выполнено{COLOR_RESET}")
+        else:
+            print(f"{COLOR_YELLOW}Подходящая контрольная точка не найдена, прогон начинается заново{COLOR_RESET}")
+    checkpoint.open(ctx.seed, checkpoint_info(ctx))
+    return checkpoint
+
+
+async def run_tests(session, healthy_urls, resume=False):
+    with create_executor() as executor:
+        ctx = RunContext(session, executor)
+        identity = await configure_endpoints(ctx, healthy_urls)
+        if CORPUS_FILE:
+            load_corpus(ctx)
+        if ADAPTIVE_SAMPLING:
+            ctx.sampler = AdaptiveSampler(SUCCESS_THRESHOLD, ADAPTIVE_CONFIDENCE, ADAPTIVE_PRECISION,
+                                          ADAPTIVE_MIN_SAMPLES, strings_per_group())
+        if CHECKPOINT_FILE:
+            ctx.checkpoint = open_checkpoint(ctx, resume)
+        print(f"{COLOR_CYAN}Передача аудио: {ctx.transport}{COLOR_RESET}")
+        print(f"{COLOR_CYAN}Seed прогона: {ctx.seed}{COLOR_RESET}")
+        oscillator_cache.resize(OSCILLATOR_CACHE_MAX_MB * 1024 ** 2)
+        if ENCODE_CACHE and identity is None:
+            print(f"{COLOR_YELLOW}/ping не сообщает encoder или version, кэш /encode отключён{COLOR_RESET}")
+        elif ENCODE_CACHE:
+            ctx.encode_cache = EncodeCache(ENCODE_CACHE_DIR, ENCODE_CACHE_MAX_MB * 1024 ** 2, identity)
+        if RESULTS_LOG:
+            ctx.result_log = ResultLog(RESULTS_LOG, RESULTS_LOG_COMPRESS)
+        try:
+            results = await run_test_groups(ctx)
+        finally:
+            ctx.endpoints.close()
+            if ctx.result_log:
+                ctx.result_log.close()
+            if ctx.checkpoint:
+                ctx.checkpoint.close()
+        # Прогон завершён полностью - контрольная точка больше не нужна
+        if ctx.checkpoint:
+            ctx.checkpoint.remove()
+        return results
+
+
+def load_corpus(ctx):
+    ctx.corpus = Corpus.load(CORPUS_FILE)
+    print(f"{COLOR_CYAN}Корпус: {CORPUS_FILE} (seed {ctx.corpus.info['seed']}, "
+          f"алфавит {ctx.corpus.info['alphabet']}){COLOR_RESET}")
+    missing = [group for group in GROUPS if group not in ctx.corpus]
+    if missing:
+        print(f"{COLOR_YELLOW}В корпусе нет групп {', '.join(map(str, missing))}, их строки будут сгенерированы{COLOR_RESET}")
+    short = [f"{group} ({ctx.corpus.count(group)})" for group in GROUPS
+             if group in ctx.corpus and ctx.corpus.count(group) < strings_per_group()]
+    if short:
+        print(f"{COLOR_YELLOW}В корпусе меньше {strings_per_group()} строк в группах {', '.join(short)}, "
+              f"прогон возьмёт только их{COLOR_RESET}")
+
+
+def strings_per_group():
+    # При адаптивной выборке это верхняя граница: группа может закончиться раньше
+    if ADAPTIVE_SAMPLING and ADAPTIVE_MAX_SAMPLES:
+        return ADAPTIVE_MAX_SAMPLES
+    return NUM_STRINGS_PER_GROUP
+
+
+def baseline_strings(ctx, group):
+    # Столько строк взял бы прогон без адаптивной выборки
+    if ctx.corpus and group in ctx.corpus:
+        return min(NUM_STRINGS_PER_GROUP, ctx.corpus.count(group))
+    return NUM_STRINGS_PER_GROUP
+
+
+def group_strings(ctx, group):
+    if ctx.corpus and group in ctx.corpus:
+        return ctx.corpus.strings(group, strings_per_group())
+    corpus_rng = make_rng(spawn_seed(ctx.seed, CORPUS_STREAM, group))
+    return generate_strings(group, strings_per_group(), corpus_rng, CORPUS_ALPHABET, CORPUS_LENGTHS,
+                            CORPUS_LENGTH_SPREAD)
+
+
+def print_sampling_total(detailed_results):
+    saved = sum(data["sampling"]["saved_requests"] for data in detailed_results.values())
+    planned = sum(data["sampling"]["planned_strings"] * (1 + len(data["sampling"]["tests"]))
+                  for data in detailed_results.values())
+    color = COLOR_RED if saved < 0 else COLOR_GREEN
+    print(f"{COLOR_BOLD}Адаптивная выборка:{COLOR_RESET} сэкономлено {color}{saved}{COLOR_RESET} из {planned} запросов "
+          f"({saved / planned if planned else 0:.1%})")
+
+
+async def run_test_groups(ctx):
     results = {}
     detailed_results = {}
 
@@ -148,6 +837,9 @@ async def run_tests(session):
         if base_name not in grouped_configs:
             grouped_configs[base_name] = []
         grouped_configs[base_name].append(config)
+    tests = ["clean"] + [config["index"] for config in NOISE_CONFIGS]
+    test_names = {"clean": CLEAN_TEST_NAME}
+    test_names.update({config["index"]: f"{config['name']} ({config['params_str']})" for config in NOISE_CONFIGS})
 
     for group in GROUPS:
         print(f"\n{COLOR_BOLD}{COLOR_CYAN}=== Тестирование группы {group} символов ==={COLOR_RESET}")
@@ -155,127 +847,134 @@ async def run_tests(session):
         group_total = 0
         group_details = []
 
-        test_strings = generate_random_digits_batch(group, NUM_STRINGS_PER_GROUP)
+        test_strings = ctx.checkpoint.strings.get(group) if ctx.checkpoint else None
+        if test_strings is None:
+            test_strings = group_strings(ctx, group)
+            if ctx.checkpoint:
+                ctx.checkpoint.write_strings(group, test_strings)
+        scheduled = {}
+        strings_run = 0
+
+        def group_done():
+            return ctx.sampler is not None and ctx.sampler.group_done(group, tests)
 
         for i, original_text in enumerate(test_strings):
+            if i not in scheduled and group_done():
+                # Все тесты группы остановлены адаптивной выборкой - оставшиеся строки не нужны
+                break
+            # Запускаем тесты следующих строк заранее, но выводим результаты строго по порядку
+            for j in range(i, min(i + MAX_CONCURRENT_STRINGS, len(test_strings))):
+                if j not in scheduled and not group_done():
+                    scheduled[j] = schedule_string(ctx, grouped_configs, test_strings[j], (group, j))
+            clean_task, noise_tasks = scheduled.pop(i)
+            string_tests = (clean_task is not None) + sum(len(tasks) for tasks in noise_tasks.values())
+            strings_run += 1
+
             string_results = {
                 "original": original_text,
                 "clean": None,
                 "noises": []
             }
+            log = ctx.result_log
+            if log:
+                log.write_string(group, i, original_text)
 
             if SILENT_MODE:
                 string_success = 0
                 string_completed = 0
-                print(f"{COLOR_BOLD}  Строка #{i+1} [0/{TOTAL_TESTS_PER_STRING}]{COLOR_RESET} ", end='', flush=True)
+                print(f"{COLOR_BOLD}  Строка #{i+1} [0/{string_tests}]{COLOR_RESET} ", end='', flush=True)
             else:
                 print(f"{COLOR_BOLD}  Строка #{i+1}:{COLOR_RESET} ", flush=True)
 
-            try:
-                audio_b64 = await encode_string(session, original_text)
-                audio_clean = base64_to_audio(audio_b64)
-                
-                decoded_text = await decode_audio(session, audio_b64)
-                similarity = calculate_similarity(original_text, decoded_text)
-                
-                if similarity >= 0.9:
-                    group_success += 1
-                    if SILENT_MODE:
-                        string_success += 1
-                
-                group_total += 1
-                
-                string_results["clean"] = {
-                    "decoded": decoded_text,
-                    "similarity": similarity,
-                    "success": similarity >= 0.9
-                }
+            # Чистый тест не запускается, если адаптивная выборка его уже остановила
+            if clean_task is not None:
+                try:
+                    string_results["clean"] = await clean_task
+                    similarity = string_results["clean"]["similarity"]
 
-                if not SILENT_MODE:
-                    color = get_color_for_percent(similarity)
-                    print(f"  [{COLOR_BOLD}Чистый{COLOR_RESET}: {color}{similarity:.2%}{COLOR_RESET}]\n", flush=True)
-                else:
-                    string_completed += 1
-                    percent = string_success / string_completed if string_completed > 0 else 0.0
-                    color = get_color_for_percent(percent)
-                    print(f"\r{COLOR_BOLD}  Строка #{i+1} {color}[{string_success}/{string_completed}/{TOTAL_TESTS_PER_STRING}]{COLOR_RESET}    ", end='', flush=True)
-
-            except Exception as e:
-                string_results["clean"] = {
-                    "error": str(e)
-                }
-                
-                if not SILENT_MODE:
-                    print(f"  [{COLOR_BOLD}Чистый{COLOR_RESET}: {COLOR_RED}🚫{COLOR_RESET}]\n", flush=True)
-                else:
-                    string_completed += 1
-                    percent = string_success / string_completed if string_completed > 0 else 0.0
-                    color = get_color_for_percent(percent)
-                    print(f"\r{COLOR_BOLD}  Строка #{i+1} {color}[{string_success}/{string_completed}/{TOTAL_TESTS_PER_STRING}]{COLOR_RESET}    ", end='', flush=True)
+                    if similarity >= 0.9:
+                        group_success += 1
+                        if SILENT_MODE:
+                            string_success += 1
+
+                    group_total += 1
+
+                    if not SILENT_MODE:
+                        color = color_for_result(string_results["clean"])
+                        print(f"  [{COLOR_BOLD}Чистый{COLOR_RESET}: {color}{similarity_mark(string_results['clean'])}{similarity:.2%}{COLOR_RESET}]\n", flush=True)
+                    else:
+                        string_completed += 1
+                        percent = string_success / string_completed if string_completed > 0 else 0.0
+                        color = get_color_for_percent(percent)
+                        print(f"\r{COLOR_BOLD}  Строка #{i+1} {color}[{string_success}/{string_completed}/{string_tests}]{COLOR_RESET}    ", end='', flush=True)
+
+                except Exception as e:
+                    string_results["clean"] = {
+                        "error": str(e)
+                    }
+
+                    if not SILENT_MODE:
+                        print(f"  [{COLOR_BOLD}Чистый{COLOR_RESET}: {COLOR_RED}🚫{COLOR_RESET}]\n", flush=True)
+                    else:
+                        string_completed += 1
+                        percent = string_success / string_completed if string_completed > 0 else 0.0
+                        color = get_color_for_percent(percent)
+                        print(f"\r{COLOR_BOLD}  Строка #{i+1} {color}[{string_success}/{string_completed}/{string_tests}]{COLOR_RESET}    ", end='', flush=True)
+
+                if log:
+                    log.write_test(group, i, "clean", string_results["clean"])
+                if ctx.sampler:
+                    ctx.sampler.record(group, "clean", string_results["clean"].get("success", False))
 
-            for base_name, configs in grouped_configs.items():
+            for base_name, tasks in noise_tasks.items():
                 if not SILENT_MODE:
                     print(f"  {COLOR_BOLD}{base_name}{COLOR_RESET}:")
 
-                for config in configs:
-                    test_result = {
-                        "name": config["name"],
-                        "params": config["params_str"],
-                        "difficulty": config["difficulty"],
-                        "color": config["color"]
-                    }
-                    
-                    audio_normalized = normalize_audio(audio_clean.copy())
-
-                    try:
-                        audio_noised_float = config["func"](audio_normalized, **config["params"])
-                        audio_noised = denormalize_audio(audio_noised_float)
-                        noised_b64 = audio_to_base64(audio_noised)
-                        
-                        decoded_text = await decode_audio(session, noised_b64)
-                        similarity = calculate_similarity(original_text, decoded_text)
-                        
+                for config, task in tasks:
+                    test_result = await task
+
+                    if "error" in test_result:
+                        if not SILENT_MODE:
+                            print(f"    [{test_result['color']}{test_result['params']}{COLOR_RESET}: {COLOR_RED}🚫 (ошибка: {test_result['error']}){COLOR_RESET}]")
+                    else:
+                        similarity = test_result["similarity"]
                         if similarity >= 0.9:
                             group_success += 1
                             if SILENT_MODE:
                                 string_success += 1
-                        
-                        test_result.update({
-                            "decoded": decoded_text,
-                            "similarity": similarity,
-                            "success": similarity >= 0.9
-                        })
 
                         if not SILENT_MODE:
-                            color_percent = get_color_for_percent(similarity)
-                            print(f"    [{config['color']}{config['params_str']}{COLOR_RESET}: {color_percent}{similarity:.2%}{COLOR_RESET}]")
-                    
-                    except Exception as e:
-                        test_result["error"] = str(e)
-                        
-                        if not SILENT_MODE:
-                            print(f"    [{config['color']}{config['params_str']}{COLOR_RESET}: {COLOR_RED}🚫 (ошибка: {str(e)}){COLOR_RESET}]")
+                            color_percent = color_for_result(test_result)
+                            print(f"    [{test_result['color']}{test_result['params']}{COLOR_RESET}: {color_percent}{similarity_mark(test_result)}{similarity:.2%}{COLOR_RESET}]")
 
                     group_total += 1
+                    if log:
+                        log.write_test(group, i, len(string_results["noises"]), test_result)
+                    if ctx.sampler:
+                        ctx.sampler.record(group, config["index"], test_result.get("success", False))
                     string_results["noises"].append(test_result)
-                    
+
                     if SILENT_MODE:
                         string_completed += 1
                         percent = string_success / string_completed if string_completed > 0 else 0.0
                         color = get_color_for_percent(percent)
-                        print(f"\r{COLOR_BOLD}  Строка #{i+1} {color}[{string_success}/{string_completed}/{TOTAL_TESTS_PER_STRING}]{COLOR_RESET}    ", end='', flush=True)
+                        print(f"\r{COLOR_BOLD}  Строка #{i+1} {color}[{string_success}/{string_completed}/{string_tests}]{COLOR_RESET}    ", end='', flush=True)
 
                 if not SILENT_MODE:
                     print(flush=False)
 
             if SILENT_MODE:
-                percent = string_success / TOTAL_TESTS_PER_STRING
+                percent = string_success / string_tests
                 color = get_color_for_percent(percent)
-                print(f"\r{COLOR_BOLD}  Строка #{i+1} {color}[{string_success}/{TOTAL_TESTS_PER_STRING}]{COLOR_RESET}    ", flush=True)
+                print(f"\r{COLOR_BOLD}  Строка #{i+1} {color}[{string_success}/{string_tests}]{COLOR_RESET}    ", flush=True)
             elif not SILENT_MODE:
                 print(end="", flush=True)
 
-            group_details.append(string_results)
+            if log:
+                # Детали строки уже в журнале, в памяти остаются только счётчики группы
+                log.flush()
+            else:
+                group_details.append(string_results)
 
         success_rate = group_success / group_total if group_total else 0
         results[group] = {
@@ -288,35 +987,71 @@ async def run_tests(session):
             "total_tests": group_total,
             "successful_tests": group_success,
             "success_rate": success_rate,
-            "details": group_details
+            "details": ctx.result_log.details(group) if ctx.result_log else group_details
         }
+        if ctx.sampler:
+            # Экономия считается относительно прогона без выборки, а не верхней границы ADAPTIVE_MAX_SAMPLES
+            sampling = ctx.sampler.group_summary(group, tests, test_names, baseline_strings(ctx, group), strings_run)
+            detailed_results[group]["sampling"] = sampling
 
         color = get_color_for_percent(success_rate)
         print(f"  {COLOR_BOLD}Результат:{COLOR_RESET} {group_success}/{group_total} ({color}{success_rate:.1%}{COLOR_RESET})")
+        if ctx.sampler:
+            ctx.sampler.print_group_summary(sampling, verbose=not SILENT_MODE)
 
     print(f"\n{COLOR_BOLD}{COLOR_CYAN}=== Итоговый отчет ==={COLOR_RESET}")
     for group, res in results.items():
         color = get_color_for_percent(res['success_rate'])
         print(f"{COLOR_BOLD}Группа {group}:{COLOR_RESET} {res['successful_tests']}/{res['total_tests']} ({color}{res['success_rate']:.1%}{COLOR_RESET})")
 
-    generate_html_report(detailed_results)
+    if ctx.sampler:
+        print_sampling_total(detailed_results)
+    ctx.timer.print_summary()
+    latency = ctx.timer.latency_summary()
+    ctx.timer.print_latency_summary(latency)
+    ctx.policy.print_summary()
+    if len(ctx.endpoints) > 1:
+        ctx.endpoints.print_summary()
+    if ctx.encode_cache:
+        ctx.encode_cache.print_summary()
+    if oscillator_cache.hits + oscillator_cache.misses:
+        print(f"{COLOR_BOLD}Кэш таблиц синуса:{COLOR_RESET} {oscillator_cache.hits} попаданий, {oscillator_cache.misses} промахов "
+              f"({oscillator_cache.hit_rate():.1%}), занято {oscillator_cache.size / 1024 ** 2:.1f} МБ")
+
+    if ctx.result_log:
+        ctx.result_log.close()
+    generate_html_report(detailed_results, latency=latency)
     
     return detailed_results
 
 
-async def main():
-    async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
-        if await ping_service(session):
-            await run_tests(session)
+async def main(resume=False):
+    # Дублирующие запросы идут сверх ctx.semaphore, им нужны свободные соединения
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS * (2 if HEDGE_REQUESTS else 1))
+    async with aiohttp.ClientSession(timeout=TIMEOUT, connector=connector) as session:
+        healthy_urls = await ping_service(session)
+        if healthy_urls:
+            return await run_tests(session, healthy_urls, resume)
+
+
+def print_resume_hint():
+    if CHECKPOINT_FILE and os.path.exists(CHECKPOINT_FILE):
+        print(f"{COLOR_YELLOW}Выполненные тесты сохранены, продолжить: python main.py --resume{COLOR_RESET}")
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Тестирование аудио кодека")
+    parser.add_argument("--resume", action="store_true", help="продолжить прерванный прогон с контрольной точки")
+    args = parser.parse_args()
     try:
         display_heart()
         input()
 
-        asyncio.run(main())
+        asyncio.run(main(args.resume))
     except KeyboardInterrupt:
         print(
             f"\n{COLOR_RED}{COLOR_BOLD}Программа прервана пользователем.{COLOR_RESET}")
+        print_resume_hint()
     except Exception as e:
-        print(f"\n{COLOR_RED}{COLOR_BOLD}Неожиданная ошибка: {e}{COLOR_RESET}")
\ No newline at end of file
+        print(f"\n{COLOR_RED}{COLOR_BOLD}Неожиданная ошибка: {e}{COLOR_RESET}")
+        print_resume_hint()
\ No newline at end of file
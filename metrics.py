@@ -0,0 +1,145 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+from color import *
+
+REQUEST_STAGES = ("encode", "decode", "decode_batch")
+
+STAGE_NAMES = {
+    "encode": "Запрос /encode",
+    "decode": "Запрос /decode",
+    "decode_batch": "Запрос /decode_batch",
+    "parse": "Разбор WAV",
+    "noise": "Генерация шума",
+    "serialize": "Сериализация WAV",
+    "similarity": "Расчёт сходства",
+    "stream": "Потоковая генерация шума и WAV",
+    "cache": "Чтение/запись кэша /encode",
+}
+
+
+# Виды замеров задержки по группам и типам шума; "test" - шум, WAV и /decode одного теста
+LATENCY_NAMES = {
+    "encode": "/encode",
+    "decode": "/decode",
+    "decode_batch": "/decode_batch",
+    "test": "тест",
+}
+
+
+def percentiles(samples):
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "count": len(samples)}
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class StageTimer:
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.sizes = defaultdict(int)
+        self.size_counts = defaultdict(int)
+        self.latencies = defaultdict(list)
+        self.payload_sizes = defaultdict(list)
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+
+    def add(self, stage, seconds):
+        self.totals[stage] += seconds
+        self.counts[stage] += 1
+
+    def add_bytes(self, stage, size, key=None):
+        self.sizes[stage] += size
+        self.size_counts[stage] += 1
+        if key is not None:
+            self.payload_sizes[key].append(size)
+
+    def record(self, kind, key, seconds):
+        # key - (группа, тип шума); у /encode тип шума None
+        self.latencies[(kind, *key)].append(seconds)
+
+    @contextmanager
+    def measure(self, stage, key=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.add(stage, elapsed)
+            if key is not None:
+                self.record(stage, key, elapsed)
+
+    def latency_summary(self):
+        by_group = defaultdict(lambda: defaultdict(list))
+        by_noise = defaultdict(lambda: defaultdict(list))
+        for (kind, group, name), samples in self.latencies.items():
+            by_group[group][kind].extend(samples)
+            if name is not None:
+                by_noise[name][kind].extend(samples)
+
+        sizes_by_group = defaultdict(list)
+        sizes_by_noise = defaultdict(list)
+        for (group, name), sizes in self.payload_sizes.items():
+            sizes_by_group[group].extend(sizes)
+            if name is not None:
+                sizes_by_noise[name].extend(sizes)
+
+        def summarize(table, sizes):
+            return {
+                key: {
+                    "latency": {kind: percentiles(samples) for kind, samples in kinds.items()},
+                    "avg_bytes": float(np.mean(sizes[key])) if sizes[key] else None
+                }
+                for key, kinds in table.items()
+            }
+
+        return {"groups": summarize(by_group, sizes_by_group), "noises": summarize(by_noise, sizes_by_noise)}
+
+    def print_latency_summary(self, summary=None):
+        summary = summary or self.latency_summary()
+        print(f"\n{COLOR_BOLD}{COLOR_CYAN}=== Задержки p50 / p95 / p99, мс ==={COLOR_RESET}")
+        for title, table in (("Группа", summary["groups"]), (None, summary["noises"])):
+            if title is None and table:
+                print(f"{COLOR_BOLD}По типам шума:{COLOR_RESET}")
+            for key, data in table.items():
+                parts = []
+                for kind, name in LATENCY_NAMES.items():
+                    if kind in data["latency"]:
+                        p = data["latency"][kind]
+                        parts.append(f"{name} {p['p50'] * 1000:.1f} / {p['p95'] * 1000:.1f} / {p['p99'] * 1000:.1f}")
+                if data["avg_bytes"] is not None:
+                    parts.append(f"{data['avg_bytes'] / 1024:.1f} КБ на запрос")
+                label = f"{title} {key}" if title else f"  {key}"
+                print(f"{COLOR_BOLD}{label}:{COLOR_RESET} " + ", ".join(parts))
+
+    def print_summary(self):
+        wall_time = time.perf_counter() - self.started
+        cpu_time = time.process_time() - self.cpu_started
+        stages_time = sum(self.totals.values())
+
+        print(f"\n{COLOR_BOLD}{COLOR_CYAN}=== Время по стадиям ==={COLOR_RESET}")
+        for stage, total in self.totals.items():
+            name = STAGE_NAMES.get(stage, stage)
+            count = self.counts[stage]
+            line = f"{COLOR_BOLD}{name}:{COLOR_RESET} {total:.2f} с ({count} шт., {total / count * 1000:.1f} мс в среднем"
+            if self.size_counts[stage]:
+                line += f", {self.sizes[stage] / self.size_counts[stage] / 1024:.1f} КБ на запрос"
+            print(line + ")")
+
+        saved = stages_time - wall_time
+        print(f"{COLOR_BOLD}Сумма стадий:{COLOR_RESET} {stages_time:.2f} с, {COLOR_BOLD}фактическое время:{COLOR_RESET} {wall_time:.2f} с")
+        if saved > 0:
+            print(f"{COLOR_GREEN}Экономия за счёт перекрытия стадий: {saved:.2f} с ({saved / stages_time:.1%}){COLOR_RESET}")
+
+        requests = sum(self.counts[stage] for stage in REQUEST_STAGES)
+        if requests and wall_time > 0:
+            print(f"{COLOR_BOLD}Запросов:{COLOR_RESET} {requests} ({requests / wall_time:.1f} запр/с), "
+                  f"{COLOR_BOLD}CPU клиента:{COLOR_RESET} {cpu_time / requests * 1000:.2f} мс на запрос")
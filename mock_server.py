@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import base64
+import io
+import random
+import time
+
+import numpy as np
+import scipy.io.wavfile as wavfile
+from aiohttp import web
+
+from color import *
+
+SAMPLE_RATE = 44_100
+SAMPLES_PER_BYTE = 64  # Длительность одного байта текста в отсчётах
+LEVEL_STEP = 200  # Шаг амплитуды между соседними значениями байта
+
+
+def encode_text(text):
+    codes = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.int32)
+    levels = ((codes - 127.5) * LEVEL_STEP).astype(np.int16)
+    return np.repeat(levels, SAMPLES_PER_BYTE)
+
+
+def decode_samples(audio):
+    length = len(audio) // SAMPLES_PER_BYTE * SAMPLES_PER_BYTE
+    blocks = audio[:length].astype(np.float32).reshape(-1, SAMPLES_PER_BYTE).mean(axis=1)
+    codes = np.clip(np.rint(blocks / LEVEL_STEP + 127.5), 0, 255).astype(np.uint8)
+    return codes.tobytes().decode("utf-8", errors="replace")
+
+
+def samples_to_wav(audio):
+    buffer = io.BytesIO()
+    wavfile.write(buffer, SAMPLE_RATE, audio)
+    return buffer.getvalue()
+
+
+def wav_to_samples(wav_bytes):
+    with io.BytesIO(wav_bytes) as wav_buffer:
+        _, audio = wavfile.read(wav_buffer)
+    return audio
+
+
+class MockCodecServer:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+
+    async def simulate(self):
+        self.requests += 1
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            raise web.HTTPInternalServerError(text="mock error")
+
+    async def read_audio(self, request):
+        if request.content_type == "audio/wav":
+            return wav_to_samples(await request.read())
+        data = await request.json()
+        return wav_to_samples(base64.b64decode(data["data"]))
+
+    async def ping(self, request):
+        return web.json_response({"status": "ok", "binary_audio": True, "encoder": "mock", "version": "1"})
+
+    async def stats(self, request):
+        elapsed = time.perf_counter() - self.started
+        return web.json_response({
+            "requests": self.requests,
+            "errors": self.errors,
+            "uptime": elapsed,
+            "requests_per_second": self.requests / elapsed if elapsed else 0.0
+        })
+
+    async def encode(self, request):
+        data = await request.json()
+        await self.simulate()
+        wav_bytes = samples_to_wav(encode_text(data["text"]))
+        if request.headers.get("Accept") == "audio/wav":
+            return web.Response(body=wav_bytes, content_type="audio/wav")
+        return web.json_response({"data": base64.b64encode(wav_bytes).decode("utf-8")})
+
+    async def decode(self, request):
+        audio = await self.read_audio(request)
+        await self.simulate()
+        return web.json_response({"text": decode_samples(audio)})
+
+    async def decode_batch(self, request):
+        data = await request.json()
+        await self.simulate()
+        texts = [decode_samples(wav_to_samples(base64.b64decode(item))) for item in data["data"]]
+        return web.json_response({"texts": texts})
+
+    def create_app(self):
+        app = web.Application(client_max_size=1024 ** 3)
+        app.add_routes([
+            web.get("/ping", self.ping),
+            web.get("/stats", self.stats),
+            web.post("/encode", self.encode),
+            web.post("/decode", self.decode),
+            web.post("/decode_batch", self.decode_batch),
+        ])
+        return app
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Локальный сервер-заглушка аудио кодека для замеров RGBTester")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, сек")
+    parser.add_argument("--jitter", type=float, default=0.0, help="разброс задержки, сек")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой 500")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = MockCodecServer(args.latency, args.jitter, args.error_rate, args.seed)
+    print(f"{COLOR_CYAN}Заглушка кодека: http://{args.host}:{args.port} "
+          f"(задержка {args.latency} с ± {args.jitter} с, ошибки {args.error_rate:.0%}){COLOR_RESET}")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
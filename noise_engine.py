@@ -0,0 +1,192 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from color import *
+from noises import *
+
+SAMPLE_RATE = 44_100
+
+
+def gaussian_family(audio, params_list, generator):
+    means = np.array([p.get("mean", 0.0) for p in params_list], dtype=np.float32)[:, None]
+    sigmas = np.array([p.get("sigma", 0.2) for p in params_list], dtype=np.float32)[:, None]
+
+    # Одна стандартная нормальная выборка масштабируется под каждую sigma
+    z = generator.standard_normal(size=len(audio), dtype=np.float32)
+    noisy = sigmas * z
+    noisy += means
+    noisy += audio
+    return noisy
+
+
+def white_family(audio, params_list, generator):
+    power_signal = np.mean(audio ** 2)
+    snr_db = np.array([p["snr_db"] for p in params_list], dtype=np.float64)
+    scales = np.sqrt(power_signal / (10 ** (snr_db / 10))).astype(np.float32)[:, None]
+
+    z = generator.standard_normal(size=len(audio), dtype=np.float32)
+    noisy = scales * z
+    noisy += audio
+    return noisy
+
+
+def impulse_family(audio, params_list, generator):
+    probabilities = np.array([p.get("probability", 0.01) for p in params_list], dtype=np.float32)[:, None]
+    amplitudes = np.array([p.get("amplitude", 0.5) for p in params_list], dtype=np.float32)[:, None]
+
+    # Общие позиции и знаки импульсов: вариант с большей вероятностью содержит все импульсы меньшей
+    u = generator.random(size=len(audio), dtype=np.float32)
+    signs = np.where(generator.random(size=len(audio)) < 0.5, -1.0, 1.0).astype(np.float32)
+
+    noisy = (u < probabilities) * (amplitudes * signs)
+    noisy += audio
+    return noisy
+
+
+def reverb_family(audio, params_list, generator):
+    noisy = np.empty((len(params_list), len(audio)), dtype=np.float32)
+    scratch = np.empty_like(audio)
+
+    for row, params in zip(noisy, params_list):
+        row[:] = audio
+        accumulate_echoes(row, audio, int(params.get("delay", 0.3) * SAMPLE_RATE), params.get("decay", 0.5),
+                          params.get("num_echos", 3), scratch)
+    return noisy
+
+
+def sin_tables(freqs, length):
+    return {freq: oscillator_cache.sine(freq, length, SAMPLE_RATE) for freq in freqs}
+
+
+def tonal_family(audio, params_list, generator):
+    tables = sin_tables({p.get("freq", 1000.0) for p in params_list}, len(audio))
+
+    noisy = np.empty((len(params_list), len(audio)), dtype=np.float32)
+    for row, params in zip(noisy, params_list):
+        np.multiply(tables[params.get("freq", 1000.0)], np.float32(params.get("amplitude", 0.1)), out=row)
+        row += audio
+    return noisy
+
+
+def ac_hum_family(audio, params_list, generator):
+    noisy = np.empty((len(params_list), len(audio)), dtype=np.float32)
+    for row, params in zip(noisy, params_list):
+        # Суммы гармоник берутся из кэша, синусы 50 Гц и кратных считаются один раз на все варианты
+        harmonics = oscillator_cache.harmonics(params.get("base_freq", 50.0), params.get("num_harmonics", 3), len(audio))
+        np.multiply(harmonics, np.float32(params.get("amplitude", 0.1)), out=row)
+        row += audio
+    return noisy
+
+
+FAMILY_FUNCS = {
+    add_gaussian_noise: gaussian_family,
+    add_white_noise: white_family,
+    add_impulse_noise: impulse_family,
+    add_reverb: reverb_family,
+    add_tonal_noise: tonal_family,
+    add_ac_hum: ac_hum_family,
+}
+
+
+def apply_family(audio, func, params_list, generator=rng):
+    """Все варианты одного семейства шума за один проход; строки результата - int16 сигналы."""
+    noisy = FAMILY_FUNCS[func](audio, params_list, generator)
+    np.clip(noisy, -1.0, 1.0, out=noisy)
+    noisy *= 32767.0
+    return noisy.astype(np.int16)
+
+
+def apply_per_config(audio, func, params_list, generator=rng):
+    rows = []
+    for params in params_list:
+        noisy = func(audio.copy(), generator=generator, **params)
+        rows.append((np.clip(noisy, -1.0, 1.0) * 32767.0).astype(np.int16))
+    return np.stack(rows)
+
+
+def benchmark(groups, samples_per_char, repeats):
+    from config import NOISE_TESTS
+
+    generator = np.random.default_rng(0)
+    for group in groups:
+        length = group * samples_per_char
+        audio = generator.uniform(-0.5, 0.5, size=length).astype(np.float32)
+        print(f"\n{COLOR_BOLD}{COLOR_CYAN}=== {group} символов ({length} отсчётов) ==={COLOR_RESET}")
+
+        for test in NOISE_TESTS:
+            params_list = [dict(zip(test["args"], case["values"])) for case in test["tests"]]
+            timings = {}
+            for name, engine in (("по конфигам", apply_per_config), ("семейством", apply_family)):
+                best = float("inf")
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    engine(audio, test["func"], params_list, generator)
+                    best = min(best, time.perf_counter() - started)
+                timings[name] = best
+
+            speedup = timings["по конфигам"] / timings["семейством"]
+            color = COLOR_GREEN if speedup >= 1 else COLOR_RED
+            print(f"  {COLOR_BOLD}{test['name']}{COLOR_RESET}: по конфигам {timings['по конфигам'] * 1000:.1f} мс, "
+                  f"семейством {timings['семейством'] * 1000:.1f} мс ({color}x{speedup:.2f}{COLOR_RESET})")
+
+
+def peak_allocation(func, *args, **kwargs):
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def allocating_test(audio, func, params):
+    audio_normalized = audio.copy()
+    noisy = func(audio_normalized, **params)
+    return (np.clip(noisy, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+
+def workspace_test(audio, func, params, workspace):
+    length = len(audio)
+    noisy = func(audio, out=workspace.buffer("out", length), scratch=workspace.buffer("scratch", length), **params)
+    np.clip(noisy, -1.0, 1.0, out=noisy)
+    noisy *= 32767.0
+    pcm = workspace.buffer("pcm", length, np.int16)
+    np.copyto(pcm, noisy, casting="unsafe")
+    return pcm
+
+
+def benchmark_memory(groups, samples_per_char):
+    from config import NOISE_TESTS
+
+    generator = np.random.default_rng(0)
+    for group in groups:
+        length = group * samples_per_char
+        audio = generator.uniform(-0.5, 0.5, size=length).astype(np.float32)
+        workspace = NoiseWorkspace()
+        print(f"\n{COLOR_BOLD}{COLOR_CYAN}=== Пиковая память на тест, {group} символов ({audio.nbytes / 1024 ** 2:.1f} МБ сигнал) ==={COLOR_RESET}")
+
+        for test in NOISE_TESTS:
+            params = dict(zip(test["args"], test["tests"][-1]["values"]))
+            # Прогрев: таблицы синуса и буферы рабочей области создаются до замера
+            workspace_test(audio, test["func"], params, workspace)
+
+            before = peak_allocation(allocating_test, audio, test["func"], params)
+            after = peak_allocation(workspace_test, audio, test["func"], params, workspace)
+            print(f"  {COLOR_BOLD}{test['name']}{COLOR_RESET}: {before / 1024 ** 2:.1f} МБ -> {after / 1024 ** 2:.2f} МБ")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сравнение пакетной генерации шумов с поконфигурационной")
+    parser.add_argument("--groups", type=int, nargs="+", default=[1_000, 5_000, 10_000, 30_000])
+    parser.add_argument("--samples-per-char", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--memory", action="store_true", help="замерить пиковую память tracemalloc вместо времени")
+    args = parser.parse_args()
+    if args.memory:
+        benchmark_memory(args.groups, args.samples_per_char)
+    else:
+        benchmark(args.groups, args.samples_per_char, args.repeats)
@@ -1,59 +1,247 @@
+import threading
+from collections import OrderedDict
+
 import numpy as np
 
+# Общий генератор для вызовов без явного rng (результаты не воспроизводимы)
 rng = np.random.default_rng()
 
 
-def add_gaussian_noise(audio: np.ndarray, mean: float = 0.0, sigma: float = 0.2) -> np.ndarray:
+def spawn_seed(seed, *key):
+    # Независимый поток для (группа, строка, конфиг) не зависит от порядка выполнения
+    return np.random.SeedSequence(seed, spawn_key=key)
+
+
+def make_rng(seed_sequence=None):
+    return rng if seed_sequence is None else np.random.default_rng(seed_sequence)
+
+
+class OscillatorCache:
+    """Ограниченный по памяти LRU-кэш таблиц синуса float32 по (длина, частота, частота дискретизации)."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.tables = OrderedDict()
+        self.lock = threading.Lock()
+
+    def sine(self, freq, length, sample_rate=44_100):
+        key = (length, freq, sample_rate)
+        table = self.lookup(key)
+        if table is None:
+            # Фаза считается в float64 по номеру отсчёта, иначе на длинных сигналах теряется точность
+            t = np.arange(length) / sample_rate
+            table = self.store(key, np.sin(2 * np.pi * freq * t).astype(np.float32))
+        return table
+
+    def cosine(self, freq, length, sample_rate=44_100):
+        key = (length, freq, sample_rate, "cos")
+        table = self.lookup(key)
+        if table is None:
+            t = np.arange(length) / sample_rate
+            table = self.store(key, np.cos(2 * np.pi * freq * t).astype(np.float32))
+        return table
+
+    def harmonics(self, base_freq, num_harmonics, length, sample_rate=44_100):
+        # Сумма гармоник sin(2*pi*k*f*t)/k с единичной амплитудой
+        key = (length, base_freq, num_harmonics, sample_rate)
+        table = self.lookup(key)
+        if table is None:
+            table = np.zeros(length, dtype=np.float32)
+            for i in range(1, num_harmonics + 1):
+                table += self.sine(base_freq * i, length, sample_rate) / np.float32(i)
+            table = self.store(key, table)
+        return table
+
+    def lookup(self, key):
+        with self.lock:
+            table = self.tables.get(key)
+            if table is not None:
+                self.tables.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return table
+
+    def store(self, key, table):
+        table.setflags(write=False)
+        if table.nbytes <= self.max_bytes:
+            with self.lock:
+                if key not in self.tables:
+                    self.tables[key] = table
+                    self.size += table.nbytes
+                self.evict()
+        return table
+
+    def resize(self, max_bytes):
+        with self.lock:
+            self.max_bytes = max_bytes
+            self.evict()
+
+    def evict(self):
+        while self.size > self.max_bytes and self.tables:
+            _, table = self.tables.popitem(last=False)
+            self.size -= table.nbytes
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+oscillator_cache = OscillatorCache(256 * 1024 ** 2)
+
+
+class NoiseWorkspace:
+    """Переиспользуемые буферы float32/int16 одного потока для out= и scratch= функций шума."""
+
+    def __init__(self):
+        self.buffers = {}
+
+    def buffer(self, name, length, dtype=np.float32):
+        buffer = self.buffers.get(name)
+        if buffer is None or len(buffer) < length or buffer.dtype != dtype:
+            buffer = np.empty(length, dtype=dtype)
+            self.buffers[name] = buffer
+        return buffer[:length]
+
+
+_local = threading.local()
+
+
+def get_workspace():
+    workspace = getattr(_local, "workspace", None)
+    if workspace is None:
+        workspace = _local.workspace = NoiseWorkspace()
+    return workspace
+
+
+def prepare_buffers(audio, out, scratch):
+    if out is None:
+        out = np.empty(audio.shape, dtype=np.float32)
+    if scratch is None:
+        scratch = np.empty(audio.shape, dtype=np.float32)
+    return out, scratch
+
+
+def add_gaussian_noise(audio: np.ndarray, mean: float = 0.0, sigma: float = 0.2,
+                       generator: np.random.Generator = rng,
+                       out: np.ndarray = None, scratch: np.ndarray = None) -> np.ndarray:
     if audio.dtype != np.float32:
         audio = audio.astype(np.float32) / np.iinfo(audio.dtype).max
-    noise = rng.normal(mean, sigma, size=audio.shape).astype(np.float32)
-    noisy = np.clip(audio + noise, -1.0, 1.0)
-    return noisy
+    out, noise = prepare_buffers(audio, out, scratch)
+
+    generator.standard_normal(dtype=np.float32, out=noise)
+    noise *= np.float32(sigma)
+    noise += np.float32(mean)
+    np.add(audio, noise, out=out)
+    return np.clip(out, -1.0, 1.0, out=out)
+
 
+def add_white_noise(audio: np.ndarray, snr_db: float, generator: np.random.Generator = rng,
+                    out: np.ndarray = None, scratch: np.ndarray = None) -> np.ndarray:
+    out, noise = prepare_buffers(audio, out, scratch)
 
-def add_white_noise(audio: np.ndarray, snr_db: float) -> np.ndarray:
-    power_signal = np.mean(audio ** 2)
+    power_signal = np.dot(audio, audio) / audio.size
     power_noise = power_signal / (10 ** (snr_db / 10))
-    noise = rng.normal(0.0, np.sqrt(power_noise),
-                       size=audio.shape).astype(np.float32)
-    return np.clip(audio + noise, -1.0, 1.0)
+    generator.standard_normal(dtype=np.float32, out=noise)
+    noise *= np.float32(np.sqrt(power_noise))
+    np.add(audio, noise, out=out)
+    return np.clip(out, -1.0, 1.0, out=out)
 
 
-def add_impulse_noise(audio: np.ndarray, probability: float = 0.01, amplitude: float = 0.5) -> np.ndarray:
-    mask = rng.random(size=audio.shape) < probability
+def add_impulse_noise(audio: np.ndarray, probability: float = 0.01, amplitude: float = 0.5,
+                      generator: np.random.Generator = rng,
+                      out: np.ndarray = None, scratch: np.ndarray = None) -> np.ndarray:
+    out, noise = prepare_buffers(audio, out, scratch)
 
-    noise = np.zeros_like(audio)
-    noise[mask] = amplitude * rng.choice([-1, 1], size=np.sum(mask))
+    # Знак импульса берётся из того же равномерного числа (u < p/2 - минус): одно число на отсчёт,
+    # поэтому потоковая передача по блокам даёт тот же шум, что и весь сигнал целиком
+    generator.random(dtype=np.float32, out=noise)
+    mask = noise < probability
+    negative = noise < probability / 2
 
-    return np.clip(audio + noise, -1.0, 1.0)
+    noise.fill(0.0)
+    noise[mask] = amplitude
+    noise[negative] = -amplitude
 
+    np.add(audio, noise, out=out)
+    return np.clip(out, -1.0, 1.0, out=out)
 
-def add_reverb(audio: np.ndarray, delay: float = 0.3, decay: float = 0.5, num_echos: int = 3) -> np.ndarray:
-    delay_samples = int(delay * 44_100)
-    output = np.copy(audio)
 
+# При большем числе эхо свёртка через FFT быстрее сложения сдвинутых копий
+FFT_REVERB_MIN_ECHOS = 32
+
+
+def accumulate_echoes(output: np.ndarray, audio: np.ndarray, delay_samples: int, decay: float, num_echos: int,
+                      scratch: np.ndarray = None) -> np.ndarray:
+    if scratch is None:
+        scratch = np.empty_like(audio)
+
+    for i in range(1, num_echos + 1):
+        shift = i * delay_samples
+        if shift >= len(audio):
+            break
+        length = len(audio) - shift
+        np.multiply(audio[:length], decay ** i, out=scratch[:length])
+        output[shift:] += scratch[:length]
+
+    return output
+
+
+def reverb_impulse_response(delay: float = 0.3, decay: float = 0.5, num_echos: int = 3) -> np.ndarray:
+    delay_samples = int(delay * 44_100)
+    impulse_response = np.zeros(num_echos * delay_samples + 1, dtype=np.float32)
+    impulse_response[0] = 1.0
     for i in range(1, num_echos + 1):
-        decay_factor = decay ** i
-        echo_signal = np.roll(audio, i * delay_samples) * decay_factor
+        impulse_response[i * delay_samples] += decay ** i
+    return impulse_response
+
+
+def add_convolution_reverb(audio: np.ndarray, impulse_response: np.ndarray) -> np.ndarray:
+    from scipy.signal import fftconvolve
+
+    output = fftconvolve(audio, impulse_response)[:len(audio)].astype(np.float32)
+    return np.clip(output, -1.0, 1.0, out=output)
+
+
+def add_reverb(audio: np.ndarray, delay: float = 0.3, decay: float = 0.5, num_echos: int = 3,
+               generator: np.random.Generator = rng,
+               out: np.ndarray = None, scratch: np.ndarray = None) -> np.ndarray:
+    delay_samples = int(delay * 44_100)
+    if num_echos >= FFT_REVERB_MIN_ECHOS and delay_samples > 0:
+        output = add_convolution_reverb(audio, reverb_impulse_response(delay, decay, num_echos))
+        if out is None:
+            return output
+        out[:] = output
+        return out
 
-        echo_signal[:i * delay_samples] = 0
-        output += echo_signal
+    out, scratch = prepare_buffers(audio, out, scratch)
+    if np.shares_memory(out, audio):
+        # Эхо читают исходный сигнал, поэтому при записи на место нужна его копия
+        audio = audio.copy()
 
-    return np.clip(output, -1.0, 1.0)
+    out[:] = audio
+    accumulate_echoes(out, audio, delay_samples, decay, num_echos, scratch)
+    return np.clip(out, -1.0, 1.0, out=out)
 
 
-def add_tonal_noise(audio: np.ndarray, freq: float = 1000.0, amplitude: float = 0.1) -> np.ndarray:
-    t = np.arange(len(audio)) / 44_100
-    noise = amplitude * np.sin(2 * np.pi * freq * t)
-    return np.clip(audio + noise, -1.0, 1.0)
+def add_tonal_noise(audio: np.ndarray, freq: float = 1000.0, amplitude: float = 0.1,
+                    generator: np.random.Generator = rng,
+                    out: np.ndarray = None, scratch: np.ndarray = None) -> np.ndarray:
+    out, noise = prepare_buffers(audio, out, scratch)
 
+    np.multiply(oscillator_cache.sine(freq, len(audio)), np.float32(amplitude), out=noise)
+    np.add(audio, noise, out=out)
+    return np.clip(out, -1.0, 1.0, out=out)
 
-def add_ac_hum(audio: np.ndarray, base_freq: float = 50.0, amplitude: float = 0.1, num_harmonics: int = 3) -> np.ndarray:
-    t = np.arange(len(audio)) / 44_100
-    noise = np.zeros_like(audio)
 
-    for i in range(1, num_harmonics + 1):
-        harmonic_freq = base_freq * i
-        noise += amplitude * np.sin(2 * np.pi * harmonic_freq * t) / i
+def add_ac_hum(audio: np.ndarray, base_freq: float = 50.0, amplitude: float = 0.1, num_harmonics: int = 3,
+               generator: np.random.Generator = rng,
+               out: np.ndarray = None, scratch: np.ndarray = None) -> np.ndarray:
+    out, noise = prepare_buffers(audio, out, scratch)
 
-    return np.clip(audio + noise, -1.0, 1.0)
+    np.multiply(oscillator_cache.harmonics(base_freq, num_harmonics, len(audio)), np.float32(amplitude), out=noise)
+    np.add(audio, noise, out=out)
+    return np.clip(out, -1.0, 1.0, out=out)
@@ -0,0 +1,565 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from html import escape
+
+from color import *
+
+REPORT_HEAD = """
+    <!DOCTYPE html>
+    <html lang="ru">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Отчет тестирования аудио кодека</title>
+        <style>
+            :root {{
+                --green: #4CAF50;
+                --yellow: #FFC107;
+                --magenta: #9C27B0;
+                --red: #F44336;
+                --gray: #f0f0f0;
+                --dark: #2c3e50;
+            }}
+            
+            * {{
+                box-sizing: border-box;
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            }}
+            
+            body {{
+                margin: 0;
+                padding: 20px;
+                background-color: #fafafa;
+                color: #333;
+                line-height: 1.6;
+            }}
+            
+            .container {{
+                max-width: 1200px;
+                margin: 0 auto;
+            }}
+            
+            header {{
+                text-align: center;
+                margin-bottom: 30px;
+                padding-bottom: 20px;
+                border-bottom: 1px solid #ddd;
+            }}
+            
+            h1, h2, h3, h4 {{
+                color: var(--dark);
+                margin-top: 0;
+            }}
+            
+            .summary {{
+                background: white;
+                border-radius: 8px;
+                box-shadow: 0 2px 10px rgba(0,0,0,0.05);
+                margin-bottom: 30px;
+                overflow: hidden;
+            }}
+            
+            .summary-grid {{
+                display: grid;
+                grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+                gap: 15px;
+                padding: 20px;
+            }}
+            
+            .summary-card {{
+                background: white;
+                border-radius: 8px;
+                padding: 15px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.05);
+                text-align: center;
+                border-left: 4px solid;
+            }}
+            
+            .group-accordion {{
+                margin-bottom: 20px;
+            }}
+            
+            .accordion-header {{
+                background: var(--dark);
+                color: white;
+                padding: 15px 20px;
+                cursor: pointer;
+                border-radius: 4px;
+                display: flex;
+                justify-content: space-between;
+                align-items: center;
+                font-weight: bold;
+            }}
+            
+            .accordion-content {{
+                background: white;
+                border-radius: 0 0 4px 4px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.05);
+                display: none;
+                padding: 20px;
+                overflow-x: auto;
+            }}
+            
+            .string-card {{
+                background: white;
+                border-radius: 4px;
+                box-shadow: 0 1px 3px rgba(0,0,0,0.08);
+                margin-bottom: 15px;
+                overflow: hidden;
+            }}
+            
+            .string-header {{
+                padding: 12px 15px;
+                background: var(--gray);
+                cursor: pointer;
+                display: flex;
+                justify-content: space-between;
+                flex-wrap: wrap;
+                gap: 10px;
+            }}
+            
+            .string-info {{
+                flex: 1;
+                min-width: 0;
+            }}
+            
+            .original-text {{
+                font-family: monospace;
+                background: #f5f5f5;
+                padding: 2px 5px;
+                border-radius: 3px;
+                display: inline-block;
+                max-width: 100%;
+                white-space: nowrap;
+                overflow: hidden;
+                text-overflow: ellipsis;
+            }}
+            
+            .test-results {{
+                display: grid;
+                grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
+                gap: 15px;
+                padding: 15px;
+            }}
+            
+            .test-card {{
+                padding: 12px;
+                border-radius: 4px;
+                border-left: 3px solid;
+                background: #f9f9f9;
+                word-wrap: break-word;
+                overflow-wrap: break-word;
+            }}
+            
+            .text-comparison {{
+                display: flex;
+                flex-direction: column;
+                gap: 5px;
+                margin: 10px 0;
+            }}
+            
+            .decoded-text {{
+                font-family: monospace;
+                background: #f0f8ff;
+                padding: 2px 5px;
+                border-radius: 3px;
+                display: inline-block;
+                max-width: 100%;
+                white-space: nowrap;
+                overflow: hidden;
+                text-overflow: ellipsis;
+            }}
+            
+            .percent {{
+                font-weight: bold;
+                font-size: 1.1em;
+            }}
+            
+            .success {{ color: var(--green); }}
+            .warning {{ color: var(--yellow); }}
+            .danger {{ color: var(--red); }}
+            .critical {{ color: var(--magenta); }}
+            
+            .error {{
+                color: var(--red);
+                font-weight: bold;
+                background: #ffebee;
+                padding: 2px 5px;
+                border-radius: 3px;
+            }}
+            
+            .diff-easy {{ border-color: var(--green); }}
+            .diff-medium {{ border-color: var(--yellow); }}
+            .diff-hard {{ border-color: var(--magenta); }}
+            .diff-extreme {{ border-color: var(--red); }}
+            
+            .latency-table {{
+                width: calc(100% - 40px);
+                margin: 0 20px 20px 20px;
+                border-collapse: collapse;
+                font-size: 0.9em;
+            }}
+            
+            .latency-table th, .latency-table td {{
+                padding: 6px 10px;
+                border-bottom: 1px solid #eee;
+                text-align: right;
+            }}
+            
+            .latency-table th:first-child, .latency-table td:first-child {{
+                text-align: left;
+            }}
+            
+            @media (max-width: 768px) {{
+                .test-results {{
+                    grid-template-columns: 1fr;
+                }}
+                
+                .summary-grid {{
+                    grid-template-columns: 1fr;
+                }}
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <header>
+                <h1>Отчет тестирования аудио кодека</h1>
+                <p>Тестирование завершено: {finished}</p>
+            </header>
+            
+            <section class="summary">
+                <h2 style="padding: 15px 20px 0 20px; margin-bottom: 0;">Сводка результатов</h2>
+                <div class="summary-grid">
+"""
+
+REPORT_SCRIPT = """
+            </section>
+        </div>
+        
+        <script>
+            function truncate(text, maxLen = 300) {
+                text = String(text);
+                return text.length > maxLen ? text.slice(0, maxLen) + '...' : text;
+            }
+
+            function percentClass(value) {
+                return value >= 0.9 ? 'success' : value >= 0.8 ? 'warning' : value >= 0.7 ? 'critical' : 'danger';
+            }
+
+            const DIFFICULTY_CLASSES = {
+                'легкий': 'diff-easy', 'средний': 'diff-medium', 'тяжелый': 'diff-hard', 'экстремальный': 'diff-extreme'
+            };
+
+            function element(tag, className, text) {
+                const el = document.createElement(tag);
+                if (className) el.className = className;
+                if (text !== undefined) el.textContent = text;
+                return el;
+            }
+
+            function textLine(label, className, text) {
+                const line = element('div');
+                line.appendChild(element('strong', null, label + ' '));
+                const span = element('span', className, truncate(text));
+                span.title = text;
+                line.appendChild(span);
+                return line;
+            }
+
+            function renderTest(title, original, test, className) {
+                const card = element('div', className);
+                card.appendChild(element('h4', null, title));
+                if ('error' in test) {
+                    card.appendChild(element('div', 'error', 'Ошибка: ' + truncate(test.error)));
+                    return card;
+                }
+                const comparison = element('div', 'text-comparison');
+                comparison.appendChild(textLine('Оригинал:', 'original-text', original));
+                comparison.appendChild(textLine('Декодировано:', 'decoded-text', test.decoded));
+                card.appendChild(comparison);
+
+                const similarity = element('div');
+                similarity.appendChild(element('strong', null, 'Сходство: '));
+                const mark = test.similarity_exact === false ? '≤' : '';
+                // Верхняя граница сходства (быстрый режим) бывает только у неуспешных тестов - цвет провала
+                const similarityClass = test.similarity_exact === false ? 'danger' : percentClass(test.similarity);
+                similarity.appendChild(element('span', 'percent ' + similarityClass,
+                                               mark + (test.similarity * 100).toFixed(1) + '%'));
+                card.appendChild(similarity);
+
+                const status = element('div');
+                status.appendChild(element('strong', null, 'Статус: '));
+                status.appendChild(document.createTextNode(test.success ? '✅ Успех' : '❌ Ошибка'));
+                card.appendChild(status);
+                return card;
+            }
+
+            function renderString(details) {
+                const data = JSON.parse(details.querySelector('script').textContent);
+                const container = element('div', 'test-results');
+                if (data.clean) {
+                    container.appendChild(renderTest('Чистый сигнал', data.original, data.clean, 'test-card'));
+                }
+                for (const noise of data.noises) {
+                    const className = 'test-card ' + (DIFFICULTY_CLASSES[noise.difficulty] || 'diff-extreme');
+                    container.appendChild(renderTest(noise.name + ' (' + noise.params + ')', data.original, noise, className));
+                }
+                details.appendChild(container);
+                details.dataset.rendered = '1';
+            }
+
+            function toggleGroup(groupId) {
+                const content = document.getElementById(groupId);
+                content.style.display = content.style.display === 'block' ? 'none' : 'block';
+            }
+            
+            function toggleString(stringId) {
+                const content = document.getElementById(stringId);
+                // Карточки тестов строятся из встроенного JSON только при первом раскрытии
+                if (!content.dataset.rendered) {
+                    renderString(content);
+                }
+                content.style.display = content.style.display === 'block' ? 'none' : 'block';
+            }
+        </script>
+    </body>
+    </html>
+    """
+
+
+def truncate(text, max_len=300):
+    if not isinstance(text, str):
+        text = str(text)
+    return text[:max_len] + ('...' if len(text) > max_len else '')
+
+
+def color_class_for(rate):
+    return "success" if rate >= 0.9 else (
+        "warning" if rate >= 0.8 else (
+            "critical" if rate >= 0.7 else "danger"
+        )
+    )
+
+
+def header_color_for(rate):
+    return (
+        "var(--green)" if rate >= 0.9 else
+        "var(--yellow)" if rate >= 0.8 else
+        "var(--magenta)" if rate >= 0.7 else "var(--red)"
+    )
+
+
+def string_data_json(string_data):
+    data = {
+        "original": string_data["original"],
+        "clean": string_data["clean"],
+        # ANSI-цвет консоли в отчёте не нужен
+        "noises": [{k: v for k, v in noise.items() if k != "color"} for noise in string_data["noises"]]
+    }
+    # "</" внутри <script> закрыл бы тег раньше времени
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def write_summary(write, results):
+    for group, data in results.items():
+        success_rate = data["success_rate"]
+        write(f"""
+        <div class="summary-card">
+            <h3>Группа {group} символов</h3>
+            <div class="percent {color_class_for(success_rate)}">{success_rate:.1%}</div>
+            <div>{data['successful_tests']} / {data['total_tests']} успешных тестов</div>
+            {sampling_note(data)}
+        </div>
+        """)
+
+
+def sampling_note(data):
+    sampling = data.get("sampling")
+    if not sampling:
+        return ""
+    return f"<div>Сэкономлено запросов: {sampling['saved_requests']} ({sampling['saved_share']:.0%})</div>"
+
+
+LATENCY_COLUMNS = (("encode", "/encode"), ("decode", "/decode"), ("decode_batch", "/decode_batch"), ("test", "Тест"))
+
+
+def write_latency_table(write, title, label, table):
+    kinds = [(kind, name) for kind, name in LATENCY_COLUMNS if any(kind in data["latency"] for data in table.values())]
+    header = "".join(f"<th>{name}, мс (p50 / p95 / p99)</th>" for _, name in kinds)
+    write(f"""
+        <h3 style="padding: 0 20px;">{title}</h3>
+        <table class="latency-table">
+            <tr><th>{label}</th>{header}<th>КБ на запрос</th></tr>
+    """)
+    for key, data in table.items():
+        cells = []
+        for kind, _ in kinds:
+            p = data["latency"].get(kind)
+            cells.append(f"<td>{p['p50'] * 1000:.1f} / {p['p95'] * 1000:.1f} / {p['p99'] * 1000:.1f}</td>"
+                         if p else "<td>—</td>")
+        size = f"{data['avg_bytes'] / 1024:.1f}" if data["avg_bytes"] is not None else "—"
+        write(f"<tr><td>{escape(str(key))}</td>{''.join(cells)}<td>{size}</td></tr>")
+    write("</table>")
+
+
+def write_latency(write, latency):
+    write("""
+            <section class="summary">
+                <h2 style="padding: 15px 20px 0 20px;">Задержки запросов</h2>
+    """)
+    write_latency_table(write, "По группам", "Группа", latency["groups"])
+    write_latency_table(write, "По типам шума", "Тип шума", latency["noises"])
+    write("""
+            </section>
+    """)
+
+
+def write_sampling(write, results):
+    write("""
+            <section class="summary">
+                <h2 style="padding: 15px 20px 0 20px;">Адаптивная выборка</h2>
+    """)
+    for group, data in results.items():
+        sampling = data.get("sampling")
+        if not sampling:
+            continue
+        write(f"""
+        <h3 style="padding: 0 20px;">Группа {group}: {sampling['strings']} строк (без выборки {sampling['planned_strings']}),
+            сэкономлено {sampling['saved_requests']} запросов ({sampling['saved_share']:.0%}:
+            {sampling['saved_decodes']} /decode, {sampling['saved_encodes']} /encode)</h3>
+        <table class="latency-table">
+            <tr><th>Тест</th><th>Успешно</th><th>Интервал {sampling['confidence']:.0%}</th><th>Остановка</th></tr>
+        """)
+        for row in sampling["tests"]:
+            stopped = f"{row['stopped']} на {row['stopped_at']}" if row["stopped"] else "—"
+            write(f"<tr><td>{escape(row['name'])}</td><td>{row['successes']}/{row['total']}</td>"
+                  f"<td>{row['low']:.1%} – {row['high']:.1%}</td><td>{stopped}</td></tr>")
+        write("</table>")
+    write("""
+            </section>
+    """)
+
+
+def write_string_card(write, group, i, string_data):
+    # Чистый тест, остановленный адаптивной выборкой, в строке отсутствует
+    total_tests = (1 if string_data["clean"] else 0) + len(string_data["noises"])
+    success_count = 0
+
+    if string_data["clean"] and "success" in string_data["clean"]:
+        success_count += 1 if string_data["clean"]["success"] else 0
+
+    for noise in string_data["noises"]:
+        if "success" in noise and noise["success"]:
+            success_count += 1
+
+    success_rate_str = success_count / total_tests if total_tests else 0
+    original = escape(truncate(string_data["original"]))
+
+    write(f"""
+            <div class="string-card">
+                <div class="string-header" onclick="toggleString('string-{group}-{i}')">
+                    <div class="string-info">
+                        <strong>Строка #{i+1}:</strong> <span class="original-text">{original}</span>
+                    </div>
+                    <div class="percent {color_class_for(success_rate_str)}">{success_rate_str:.0%}</div>
+                </div>
+                <div class="string-details" id="string-{group}-{i}" style="display: none;"><script type="application/json">{string_data_json(string_data)}</script></div>
+            </div>
+            """)
+
+
+def write_groups(write, results):
+    for group, data in results.items():
+        success_rate = data["success_rate"]
+
+        write(f"""
+        <div class="group-accordion">
+            <div class="accordion-header" style="background: {header_color_for(success_rate)};" onclick="toggleGroup('group-{group}')">
+                <span>Группа {group} символов</span>
+                <span>{success_rate:.1%} ({data['successful_tests']}/{data['total_tests']})</span>
+            </div>
+            <div class="accordion-content" id="group-{group}">
+        """)
+
+        # details может быть ленивым (журнал результатов): строки читаются и пишутся по одной
+        for i, string_data in enumerate(data["details"]):
+            write_string_card(write, group, i, string_data)
+
+        write("""
+            </div>
+        </div>
+        """)
+
+
+def generate_html_report(results, filename=None, quiet=False, latency=None):
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        filename = f"test_report_{timestamp}.html"
+
+    # Отчёт пишется в файл по частям, без сборки всей страницы в памяти
+    with open(filename, "w", encoding="utf-8") as f:
+        write = f.write
+        write(REPORT_HEAD.format(finished=datetime.now().strftime("%d.%m.%Y %H:%M:%S")))
+        write_summary(write, results)
+        write("""
+                </div>
+            </section>
+    """)
+        if latency:
+            write_latency(write, latency)
+        if any("sampling" in data for data in results.values()):
+            write_sampling(write, results)
+        write("""
+            <section class="detailed-results">
+                <h2>Детализированные результаты</h2>
+    """)
+        write_groups(write, results)
+        write(REPORT_SCRIPT)
+
+    if not quiet:
+        print(f"\n{COLOR_GREEN}Отчёт сохранён как: {os.path.abspath(filename)}{COLOR_RESET}")
+    return filename
+
+
+def synthetic_results(num_groups, strings_per_group, tests_per_string, length):
+    results = {}
+    for g in range(num_groups):
+        details = []
+        for _ in range(strings_per_group):
+            original = "7" * length
+            test = {"decoded": original, "similarity": 1.0, "success": True}
+            noises = [dict(test, name="Гауссов шум", params="mean=0.0, sigma=0.2", difficulty="средний", color="")
+                      for _ in range(tests_per_string - 1)]
+            details.append({"original": original, "clean": dict(test), "noises": noises})
+        total = strings_per_group * tests_per_string
+        results[length * (g + 1)] = {"total_tests": total, "successful_tests": total, "success_rate": 1.0,
+                                     "details": details}
+    return results
+
+
+def benchmark(string_counts, tests_per_string, length):
+    import tempfile
+
+    for strings in string_counts:
+        results = synthetic_results(1, strings, tests_per_string, length)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "report.html")
+            started = time.perf_counter()
+            generate_html_report(results, filename, quiet=True)
+            elapsed = time.perf_counter() - started
+            size = os.path.getsize(filename)
+        print(f"{COLOR_BOLD}{strings * tests_per_string} тестов:{COLOR_RESET} {elapsed * 1000:.1f} мс, "
+              f"{size / 1024 ** 2:.2f} МБ")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер времени генерации и размера HTML-отчёта")
+    parser.add_argument("--strings", type=int, nargs="+", default=[5, 50, 500, 2_000])
+    parser.add_argument("--tests-per-string", type=int, default=23)
+    parser.add_argument("--length", type=int, default=1_000)
+    args = parser.parse_args()
+    benchmark(args.strings, args.tests_per_string, args.length)
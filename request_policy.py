@@ -0,0 +1,123 @@
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+
+import aiohttp
+import numpy as np
+
+from color import *
+
+# Статусы, после которых тот же запрос имеет смысл повторить
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+def is_retryable(error):
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+
+class RequestPolicy:
+    """Таймауты по размеру тела и наблюдаемым задержкам, повторы с джиттером и дублирующие запросы."""
+
+    def __init__(self, base_timeout=10.0, timeout_per_mb=10.0, min_timeout=2.0, max_timeout=300.0, p99_factor=4.0,
+                 max_retries=2, backoff_base=0.2, backoff_max=5.0, hedge=False, hedge_percentile=95,
+                 window=200, min_samples=20):
+        self.base_timeout = base_timeout
+        self.timeout_per_mb = timeout_per_mb
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.p99_factor = p99_factor
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        # Задержки по (вид запроса, группа): размер тела внутри группы почти одинаковый
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+        self.retries = defaultdict(int)
+        self.timeouts = defaultdict(int)
+        self.hedges = defaultdict(int)
+        self.hedge_wins = defaultdict(int)
+
+    def timeout(self, kind, group, size):
+        limit = min(self.base_timeout + self.timeout_per_mb * size / 1024 ** 2, self.max_timeout)
+        samples = self.latencies[(kind, group)]
+        if len(samples) < self.min_samples:
+            return limit
+        adaptive = self.p99_factor * np.percentile(samples, 99)
+        return min(max(adaptive, self.min_timeout), limit)
+
+    def hedge_delay(self, kind, group):
+        samples = self.latencies[(kind, group)]
+        if not self.hedge or len(samples) < self.min_samples:
+            return None
+        return np.percentile(samples, self.hedge_percentile)
+
+    def backoff(self, attempt):
+        # Полный джиттер: повторы разных тестов не приходят на сервер одной волной
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def call(self, endpoints, kind, group, size, send):
+        # send(endpoint) создаёт новую корутину запроса на каждую попытку
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.attempt(endpoints, kind, group, size, send)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                self.retries[kind] += 1
+                await asyncio.sleep(self.backoff(attempt))
+
+    async def attempt(self, endpoints, kind, group, size, send):
+        timeout = self.timeout(kind, group, size)
+        first = asyncio.ensure_future(self.send_once(endpoints, kind, group, timeout, send))
+        delay = self.hedge_delay(kind, group)
+        if delay is None:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        # Медленный ответ: тот же запрос уходит на наименее загруженный сервер, берётся первый успешный
+        self.hedges[kind] += 1
+        second = asyncio.ensure_future(self.send_once(endpoints, kind, group, timeout, send))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins[kind] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def send_once(self, endpoints, kind, group, timeout, send):
+        started = time.perf_counter()
+        async with endpoints.acquire(kind) as endpoint:
+            try:
+                result = await asyncio.wait_for(send(endpoint), timeout)
+            except asyncio.TimeoutError:
+                self.timeouts[kind] += 1
+                raise
+        self.latencies[(kind, group)].append(time.perf_counter() - started)
+        return result, endpoint
+
+    def print_summary(self):
+        def counts(table):
+            return ", ".join(f"{kind} {count}" for kind, count in table.items() if count) or "0"
+
+        print(f"{COLOR_BOLD}Повторы:{COLOR_RESET} {counts(self.retries)}, {COLOR_BOLD}таймауты:{COLOR_RESET} "
+              f"{counts(self.timeouts)}")
+        if self.hedge:
+            wins = sum(self.hedge_wins.values())
+            print(f"{COLOR_BOLD}Дублирующие запросы:{COLOR_RESET} {counts(self.hedges)}, быстрее основного: {wins}")
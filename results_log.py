@@ -0,0 +1,151 @@
+import csv
+import gzip
+import json
+import os
+from datetime import datetime
+
+from color import *
+
+CSV_FIELDS = ["type", "group", "string", "test", "name", "params", "difficulty",
+              "similarity", "similarity_exact", "success", "error", "text"]
+
+
+def open_log(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+class ResultLog:
+    """Построчный журнал результатов: строка теста пишется сразу, в памяти остаются только сводки."""
+
+    def __init__(self, fmt="jsonl", compress=False, path=None):
+        if path is None:
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            path = f"test_results_{timestamp}.{fmt}" + (".gz" if compress else "")
+        self.path = path
+        self.fmt = fmt
+        self.file = open_log(path, "a")
+        self.writer = csv.DictWriter(self.file, CSV_FIELDS) if fmt == "csv" else None
+        if self.writer and self.file.tell() == 0:
+            self.writer.writeheader()
+
+    def write(self, record):
+        if self.writer:
+            self.writer.writerow(record)
+        else:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_string(self, group, string_index, original):
+        self.write({"type": "string", "group": group, "string": string_index, "text": original})
+
+    def write_test(self, group, string_index, test, result):
+        record = {"type": "test", "group": group, "string": string_index, "test": test}
+        for key in ("name", "params", "difficulty", "similarity", "success", "error"):
+            if key in result:
+                record[key] = result[key]
+        if "similarity_exact" in result:
+            record["similarity_exact"] = result["similarity_exact"]
+        if "decoded" in result:
+            record["text"] = result["decoded"]
+        self.write(record)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            print(f"{COLOR_GREEN}Журнал результатов сохранён как: {os.path.abspath(self.path)}{COLOR_RESET}")
+
+    def details(self, group):
+        return LogDetails(self.path, self.fmt, group)
+
+
+def parse_csv_record(row):
+    record = {key: value for key, value in row.items() if value != ""}
+    record["group"] = int(record["group"])
+    record["string"] = int(record["string"])
+    if "similarity" in record:
+        record["similarity"] = float(record["similarity"])
+    for key in ("success", "similarity_exact"):
+        if key in record:
+            record[key] = record[key] == "True"
+    return record
+
+
+def read_records(path, fmt):
+    with open_log(path, "r") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield parse_csv_record(row)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def record_to_result(record):
+    result = {key: record[key] for key in ("name", "params", "difficulty", "similarity", "success", "error",
+                                           "similarity_exact") if key in record}
+    if "text" in record:
+        result["decoded"] = record["text"]
+    return result
+
+
+class LogDetails:
+    """Ленивое чтение деталей группы из журнала в формате detailed_results[group]["details"]."""
+
+    def __init__(self, path, fmt, group):
+        self.path = path
+        self.fmt = fmt
+        self.group = group
+
+    def __iter__(self):
+        string_results = None
+        for record in read_records(self.path, self.fmt):
+            if record["group"] != self.group:
+                continue
+            if record["type"] == "string":
+                if string_results is not None:
+                    yield string_results
+                string_results = {"original": record["text"], "clean": None, "noises": []}
+            elif record["test"] == "clean":
+                string_results["clean"] = record_to_result(record)
+            else:
+                string_results["noises"].append(record_to_result(record))
+        if string_results is not None:
+            yield string_results
+
+
+def log_format(path):
+    return "csv" if path.removesuffix(".gz").endswith(".csv") else "jsonl"
+
+
+def load_log_results(path):
+    """Итоги групп из готового журнала в формате detailed_results, детали читаются лениво."""
+    fmt = log_format(path)
+    totals = {}
+    for record in read_records(path, fmt):
+        if record["type"] != "test":
+            continue
+        group = record["group"]
+        success, total = totals.get(group, (0, 0))
+        # Как в прогоне: ошибка чистого теста не входит в итог группы, ошибка теста с шумом - неудача
+        if "error" in record:
+            if str(record["test"]) != "clean":
+                total += 1
+        else:
+            success += record["similarity"] >= 0.9
+            total += 1
+        totals[group] = (success, total)
+
+    return {
+        group: {
+            "total_tests": total,
+            "successful_tests": success,
+            "success_rate": success / total if total else 0,
+            "details": LogDetails(path, fmt, group),
+        }
+        for group, (success, total) in totals.items()
+    }
@@ -0,0 +1,124 @@
+import math
+from statistics import NormalDist
+
+from color import *
+from similarity import SUCCESS_THRESHOLD
+
+STOP_REASONS = {
+    "above": "выше порога",
+    "below": "ниже порога",
+    "precision": "точность достигнута",
+}
+
+
+def wilson_interval(successes, total, confidence=0.95, one_sided=False):
+    """Доверительный интервал Уилсона для доли успехов: не вырождается при 0% и 100%.
+    С one_sided каждая граница - односторонняя граница уровня confidence."""
+    if total == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(confidence if one_sided else 0.5 + confidence / 2)
+    p = successes / total
+    denominator = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+class Estimate:
+    def __init__(self):
+        self.successes = 0
+        self.total = 0
+        self.stopped = None  # Причина остановки из STOP_REASONS
+        self.stopped_at = None
+
+
+class AdaptiveSampler:
+    """Последовательная выборка: тест (группа, конфиг) больше не запускается, когда доверительный интервал
+    доли успехов достаточно узкий или целиком лежит по одну сторону от порога успеха."""
+
+    def __init__(self, threshold=SUCCESS_THRESHOLD, confidence=0.95, precision=0.05, min_samples=5, max_samples=100):
+        self.threshold = threshold
+        self.confidence = confidence
+        self.precision = precision
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.estimates = {}
+
+    def estimate(self, group, test):
+        key = (group, test)
+        if key not in self.estimates:
+            self.estimates[key] = Estimate()
+        return self.estimates[key]
+
+    def interval(self, estimate):
+        return wilson_interval(estimate.successes, estimate.total, self.confidence)
+
+    def active(self, group, test):
+        return self.estimate(group, test).stopped is None
+
+    def record(self, group, test, success):
+        estimate = self.estimate(group, test)
+        estimate.total += 1
+        estimate.successes += bool(success)
+        if estimate.stopped is not None or estimate.total < self.min_samples:
+            return
+        # Вопрос "выше или ниже порога" односторонний: двусторонний интервал требовал бы лишних строк
+        low, high = wilson_interval(estimate.successes, estimate.total, self.confidence, one_sided=True)
+        if low >= self.threshold:
+            estimate.stopped = "above"
+        elif high < self.threshold:
+            estimate.stopped = "below"
+        else:
+            low, high = self.interval(estimate)
+            if (high - low) / 2 <= self.precision:
+                estimate.stopped = "precision"
+        if estimate.stopped:
+            estimate.stopped_at = estimate.total
+
+    def group_done(self, group, tests):
+        return all(not self.active(group, test) for test in tests)
+
+    def group_summary(self, group, tests, names, planned_strings, strings_run):
+        """Интервалы по тестам группы (включая "clean") и запросы, сэкономленные относительно прогона
+        без адаптивной выборки (planned_strings строк); отрицательные - выборка отправила больше запросов."""
+        rows = []
+        saved_decodes = 0
+        for test in tests:
+            estimate = self.estimate(group, test)
+            low, high = self.interval(estimate)
+            saved_decodes += planned_strings - estimate.total
+            rows.append({
+                "name": names[test],
+                "successes": estimate.successes,
+                "total": estimate.total,
+                "low": low,
+                "high": high,
+                "stopped": STOP_REASONS.get(estimate.stopped),
+                "stopped_at": estimate.stopped_at,
+            })
+        # На строку один /encode и по /decode на каждый тест
+        planned = planned_strings * (1 + len(tests))
+        saved = saved_decodes + planned_strings - strings_run
+        return {
+            "confidence": self.confidence,
+            "tests": rows,
+            "strings": strings_run,
+            "planned_strings": planned_strings,
+            "saved_decodes": saved_decodes,
+            "saved_encodes": planned_strings - strings_run,
+            "saved_requests": saved,
+            "saved_share": saved / planned if planned else 0.0,
+        }
+
+    def print_group_summary(self, summary, verbose=False):
+        color = COLOR_RED if summary["saved_requests"] < 0 else COLOR_GREEN
+        print(f"  {COLOR_BOLD}Адаптивная выборка:{COLOR_RESET} {summary['strings']} строк "
+              f"(без выборки {summary['planned_strings']}), "
+              f"сэкономлено {color}{summary['saved_requests']}{COLOR_RESET} запросов ({summary['saved_share']:.0%}: "
+              f"{summary['saved_decodes']} /decode, {summary['saved_encodes']} /encode)")
+        if not verbose:
+            return
+        for row in summary["tests"]:
+            stopped = f", {row['stopped']} на {row['stopped_at']}" if row["stopped"] else ""
+            print(f"    {row['name']}: {row['successes']}/{row['total']}, "
+                  f"{summary['confidence']:.0%} интервал [{row['low']:.1%}; {row['high']:.1%}]{stopped}")
@@ -0,0 +1,85 @@
+import argparse
+import time
+
+import numpy as np
+from Levenshtein import distance as levenshtein_distance
+
+from color import *
+
+SUCCESS_THRESHOLD = 0.9
+
+
+def calculate_similarity(original, decoded):
+    if not original:
+        return 0.0
+    max_len = max(len(original), len(decoded))
+    lev_dist = levenshtein_distance(original, decoded)
+    return 1.0 - (lev_dist / max_len)
+
+
+def distance_budget(max_len, threshold):
+    # Наибольшее расстояние, при котором 1 - d / max_len >= threshold в той же арифметике float
+    budget = int((1.0 - threshold) * max_len) + 1
+    while budget >= 0 and 1.0 - (budget / max_len) < threshold:
+        budget -= 1
+    return budget
+
+
+def bounded_similarity(original, decoded, threshold=SUCCESS_THRESHOLD):
+    """Сходство и признак точности: ниже порога возвращается только верхняя граница."""
+    if not original:
+        return 0.0, True
+    max_len = max(len(original), len(decoded))
+    budget = distance_budget(max_len, threshold)
+    if budget < 0:
+        return calculate_similarity(original, decoded), True
+
+    # Ленточный алгоритм прекращает счёт, как только расстояние превысит бюджет
+    lev_dist = levenshtein_distance(original, decoded, score_cutoff=budget)
+    if lev_dist > budget:
+        return 1.0 - ((budget + 1) / max_len), False
+    return 1.0 - (lev_dist / max_len), True
+
+
+def batch_similarity(original, decoded_list, threshold=SUCCESS_THRESHOLD):
+    return [bounded_similarity(original, decoded, threshold) for decoded in decoded_list]
+
+
+def corrupt(text, error_rate, generator):
+    digits = np.frombuffer(text.encode(), dtype=np.uint8).copy()
+    mask = generator.random(len(digits)) < error_rate
+    digits[mask] = generator.integers(48, 58, size=mask.sum(), dtype=np.uint8)
+    return digits.tobytes().decode()
+
+
+def benchmark(groups, error_rates, repeats):
+    generator = np.random.default_rng(0)
+    for group in groups:
+        original = generator.integers(48, 58, size=group, dtype=np.uint8).tobytes().decode()
+        decoded_list = [corrupt(original, rate, generator) for rate in error_rates]
+
+        timings = {}
+        for name, func in (("точный", lambda: [calculate_similarity(original, d) for d in decoded_list]),
+                           ("пороговый", lambda: batch_similarity(original, decoded_list))):
+            best = float("inf")
+            for _ in range(repeats):
+                started = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - started)
+            timings[name] = best
+
+        speedup = timings["точный"] / timings["пороговый"]
+        color = COLOR_GREEN if speedup >= 1 else COLOR_RED
+        print(f"{COLOR_BOLD}Группа {group}:{COLOR_RESET} точный {timings['точный'] * 1000:.2f} мс, "
+              f"пороговый {timings['пороговый'] * 1000:.2f} мс ({color}x{speedup:.1f}{COLOR_RESET})")
+
+
+if __name__ == "__main__":
+    from config import GROUPS
+
+    parser = argparse.ArgumentParser(description="Сравнение точного и порогового расчёта сходства")
+    parser.add_argument("--groups", type=int, nargs="+", default=GROUPS)
+    parser.add_argument("--error-rates", type=float, nargs="+", default=[0.0, 0.01, 0.05, 0.2, 0.5, 0.9])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    benchmark(args.groups, args.error_rates, args.repeats)
@@ -0,0 +1,137 @@
+import base64
+
+import numpy as np
+
+from noises import *
+from wav_codec import SAMPLE_RATE, WAV_HEADER_SIZE, JSON_PREFIX, JSON_SUFFIX, base64_length, wav_header
+
+
+def iter_blocks(audio, block_size):
+    for start in range(0, len(audio), block_size):
+        yield audio[start:start + block_size]
+
+
+def stream_gaussian(blocks, generator, mean=0.0, sigma=0.2):
+    workspace = NoiseWorkspace()
+    for block in blocks:
+        yield add_gaussian_noise(block, mean, sigma, generator,
+                                 out=workspace.buffer("out", len(block)), scratch=workspace.buffer("scratch", len(block)))
+
+
+def stream_white(blocks, generator, snr_db, signal_power):
+    # Мощность сигнала считается по всему сигналу заранее, иначе SNR плавал бы от блока к блоку
+    sigma = np.sqrt(signal_power / (10 ** (snr_db / 10)))
+    yield from stream_gaussian(blocks, generator, 0.0, sigma)
+
+
+def stream_impulse(blocks, generator, probability=0.01, amplitude=0.5):
+    workspace = NoiseWorkspace()
+    for block in blocks:
+        yield add_impulse_noise(block, probability, amplitude, generator,
+                                out=workspace.buffer("out", len(block)), scratch=workspace.buffer("scratch", len(block)))
+
+
+def stream_reverb(blocks, generator, delay=0.3, decay=0.5, num_echos=3):
+    delay_samples = int(delay * SAMPLE_RATE)
+    tail_size = num_echos * delay_samples
+    # Хвост из последних tail_size входных отсчётов переносится между блоками
+    tail = np.zeros(tail_size, dtype=np.float32)
+
+    for block in blocks:
+        extended = np.concatenate((tail, block))
+        output = block.astype(np.float32)
+        for i in range(1, num_echos + 1):
+            start = tail_size - i * delay_samples
+            output += extended[start:start + len(block)] * np.float32(decay ** i)
+        if tail_size:
+            tail = extended[-tail_size:]
+        yield np.clip(output, -1.0, 1.0, out=output)
+
+
+def stream_oscillator(blocks, components):
+    # components: (частота, амплитуда); фаза продолжается по номеру отсчёта от начала сигнала.
+    # Блок с начальной фазой p собирается из таблиц длины блока: sin(p + wt) = sin(p) cos(wt) + cos(p) sin(wt)
+    workspace = NoiseWorkspace()
+    tables = []
+    offset = 0
+    for block in blocks:
+        length = len(block)
+        if not tables or length > len(tables[0][2]):
+            tables = [(freq, amplitude, oscillator_cache.sine(freq, length, SAMPLE_RATE),
+                       oscillator_cache.cosine(freq, length, SAMPLE_RATE)) for freq, amplitude in components]
+        output = workspace.buffer("out", length)
+        noise = workspace.buffer("scratch", length)
+        np.copyto(output, block, casting="unsafe")
+        for freq, amplitude, sine, cosine in tables:
+            # Фаза в float64 по модулю периода, чтобы не терять точность к концу длинного сигнала
+            phase = 2 * np.pi * ((freq * offset / SAMPLE_RATE) % 1.0)
+            np.multiply(cosine[:length], np.float32(amplitude * np.sin(phase)), out=noise)
+            output += noise
+            np.multiply(sine[:length], np.float32(amplitude * np.cos(phase)), out=noise)
+            output += noise
+        offset += length
+        yield np.clip(output, -1.0, 1.0, out=output)
+
+
+def stream_tonal(blocks, generator, freq=1000.0, amplitude=0.1):
+    yield from stream_oscillator(blocks, [(freq, amplitude)])
+
+
+def stream_ac_hum(blocks, generator, base_freq=50.0, amplitude=0.1, num_harmonics=3):
+    yield from stream_oscillator(blocks, [(base_freq * i, amplitude / i) for i in range(1, num_harmonics + 1)])
+
+
+STREAM_FUNCS = {
+    add_gaussian_noise: stream_gaussian,
+    add_white_noise: stream_white,
+    add_impulse_noise: stream_impulse,
+    add_reverb: stream_reverb,
+    add_tonal_noise: stream_tonal,
+    add_ac_hum: stream_ac_hum,
+}
+
+
+def noise_blocks(audio, func, params, generator=rng, block_size=65_536):
+    """Зашумлённый сигнал блоками float32; каждый блок действителен только до следующей итерации."""
+    params = dict(params)
+    if func is add_white_noise:
+        params["signal_power"] = np.dot(audio, audio) / audio.size
+    return STREAM_FUNCS[func](iter_blocks(audio, block_size), generator, **params)
+
+
+def wav_chunks(float_blocks, num_samples):
+    yield wav_header(num_samples)
+    for block in float_blocks:
+        np.clip(block, -1.0, 1.0, out=block)
+        block *= 32767.0
+        yield block.astype(np.int16).tobytes()
+
+
+def base64_chunks(chunks):
+    # Кодируем кратными 3 байтам кусками, остаток переносится в следующий кусок
+    remainder = b""
+    for chunk in chunks:
+        data = remainder + chunk
+        cut = len(data) - len(data) % 3
+        remainder = data[cut:]
+        if cut:
+            yield base64.b64encode(data[:cut])
+    if remainder:
+        yield base64.b64encode(remainder)
+
+
+def json_audio_chunks(chunks):
+    yield JSON_PREFIX
+    yield from base64_chunks(chunks)
+    yield JSON_SUFFIX
+
+
+def stream_payload(audio, func, params, generator=rng, block_size=65_536, transport="json"):
+    """Тело запроса /decode кусками и его полная длина, не собирая весь WAV в памяти."""
+    num_samples = len(audio)
+    wav_size = WAV_HEADER_SIZE + num_samples * 2
+    chunks = wav_chunks(noise_blocks(audio, func, params, generator, block_size), num_samples)
+
+    if transport == "binary":
+        return chunks, wav_size, "audio/wav"
+    return json_audio_chunks(chunks), len(JSON_PREFIX) + base64_length(wav_size) + len(JSON_SUFFIX), "application/json"
@@ -0,0 +1,108 @@
+import binascii
+import struct
+
+import numpy as np
+
+SAMPLE_RATE = 44_100
+WAV_HEADER_SIZE = 44
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+JSON_PREFIX = b'{"data": "'
+JSON_SUFFIX = b'"}'
+# Кусок для base64 кратен 3 байтам и помещается в кэш процессора
+BASE64_CHUNK = 3 * 2 ** 16
+
+
+class WavFormatError(ValueError):
+    pass
+
+
+class UnsupportedWavFormat(WavFormatError):
+    """Корректный WAV, но не PCM16 моно - такой разбирает scipy."""
+
+
+class JsonAudioBody(bytearray):
+    """Готовое тело {"data": "<base64 WAV>"} для /decode: отправляется как есть, без str и json.dumps."""
+
+    def base64_text(self):
+        return self[len(JSON_PREFIX):-len(JSON_SUFFIX)].decode("ascii")
+
+
+def base64_length(size):
+    return (size + 2) // 3 * 4
+
+
+def wav_header(num_samples, sample_rate=SAMPLE_RATE):
+    data_size = num_samples * 2
+    return WAV_HEADER.pack(
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", data_size
+    )
+
+
+def encode_wav(pcm, sample_rate=SAMPLE_RATE):
+    # Отсчёты копируются один раз - из memoryview массива сразу в итоговый bytes рядом с заголовком
+    pcm = np.asarray(pcm)
+    if pcm.dtype.kind != "i" or pcm.dtype.itemsize != 2:
+        # Молча приведённый float дал бы мусор вместо звука: сначала denormalize_audio
+        raise TypeError(f"WAV PCM16 ожидает отсчёты int16, получен {pcm.dtype}")
+    pcm = np.ascontiguousarray(pcm, dtype="<i2")
+    return b"".join((wav_header(pcm.size, sample_rate), memoryview(pcm).cast("B")))
+
+
+def base64_into(out, offset, data):
+    # base64 кусками прямо в заранее выделенный буфер, без промежуточной строки на весь WAV
+    source = memoryview(data)
+    for start in range(0, len(source), BASE64_CHUNK):
+        encoded = binascii.b2a_base64(source[start:start + BASE64_CHUNK], newline=False)
+        out[offset:offset + len(encoded)] = encoded
+        offset += len(encoded)
+    return offset
+
+
+def encode_wav_json(pcm, sample_rate=SAMPLE_RATE):
+    wav = encode_wav(pcm, sample_rate)
+    body = JsonAudioBody(len(JSON_PREFIX) + base64_length(len(wav)) + len(JSON_SUFFIX))
+    body[:len(JSON_PREFIX)] = JSON_PREFIX
+    base64_into(body, len(JSON_PREFIX), wav)
+    body[-len(JSON_SUFFIX):] = JSON_SUFFIX
+    return body
+
+
+def parse_wav_header(buffer):
+    """Формат и положение данных WAV; чанки кроме fmt и data (LIST и т.п.) пропускаются."""
+    view = memoryview(buffer)
+    if len(view) < 12 or view[:4] != b"RIFF" or view[8:12] != b"WAVE":
+        raise WavFormatError("нет заголовка RIFF/WAVE")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", view, offset)
+        offset += 8
+        if chunk_id == b"fmt ":
+            if chunk_size < 16 or offset + 16 > len(view):
+                raise WavFormatError("обрезан чанк fmt")
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", view, offset)
+            fmt = {"format": audio_format, "channels": channels, "sample_rate": sample_rate, "bits": bits}
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise WavFormatError("чанк data раньше fmt")
+            if offset + chunk_size > len(view):
+                raise WavFormatError(f"обрезаны данные: {len(view) - offset} байт из {chunk_size}")
+            return fmt, offset, chunk_size
+        offset += chunk_size + chunk_size % 2
+    raise WavFormatError("нет чанка data")
+
+
+def decode_wav(buffer):
+    # Отсчёты не копируются: массив смотрит в буфер ответа
+    fmt, offset, size = parse_wav_header(buffer)
+    if fmt["format"] != 1 or fmt["bits"] != 16 or fmt["channels"] != 1:
+        raise UnsupportedWavFormat(f"формат {fmt['format']}, {fmt['bits']} бит, {fmt['channels']} канал(а)")
+    return np.frombuffer(buffer, dtype="<i2", count=size // 2, offset=offset)
+
+
+def decode_wav_base64(text):
+    return decode_wav(binascii.a2b_base64(text))